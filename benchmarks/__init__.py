@@ -0,0 +1 @@
+"""Бенчмарки конвертеров: генератор синтетического корпуса и замеры по стадиям."""
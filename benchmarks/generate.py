@@ -0,0 +1,134 @@
+"""
+Генератор синтетических EAF и TextGrid (short/long) заданного размера.
+
+    python -m benchmarks.generate out/ --tiers 30 --annotations 100000 \
+        --label-length 3 --share 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+from converters.eaf_to_textgrid_core import write_textgrid
+from converters.textgrid_to_eaf_core import EAF, write_eaf_stream
+
+
+@dataclass
+class CorpusSpec:
+    """
+    Параметры синтетического файла.
+
+    Attributes:
+        tiers: Число уровней.
+        annotations: Аннотаций на уровень.
+        label_length: Длина метки в символах.
+        share: Доля границ, общих с первым уровнем (0 — у каждого свои
+            тайм-слоты, 1 — все уровни на одних и тех же слотах).
+        gap: Вероятность паузы между соседними аннотациями.
+        seed: Зерно генератора.
+    """
+    tiers: int = 4
+    annotations: int = 1000
+    label_length: int = 4
+    share: float = 0.5
+    gap: float = 0.2
+    seed: int = 0
+
+
+def make_tiers(spec: CorpusSpec) -> Tuple[List[Tuple[str, int]], List[Tuple[str, List[Tuple[str, str, str]]]]]:
+    """
+    Тайм-слоты (id, мс) и уровни (имя, [(ts1, ts2, метка), ...]).
+    Общие границы ссылаются на один и тот же тайм-слот.
+    """
+    rnd = random.Random(spec.seed)
+    alphabet = string.ascii_lowercase
+    slots: List[Tuple[str, int]] = []
+
+    def new_slot(ms: int) -> str:
+        ts_id = f"ts{len(slots) + 1}"
+        slots.append((ts_id, ms))
+        return ts_id
+
+    # опорная сетка первого уровня: (начало, конец) в мс
+    grid: List[Tuple[int, int]] = []
+    cursor = 0
+    for _ in range(spec.annotations):
+        if rnd.random() < spec.gap:
+            cursor += rnd.randint(20, 300)
+        length = rnd.randint(30, 400)
+        grid.append((cursor, cursor + length))
+        cursor += length
+    shared = {}
+    for pair in grid:
+        for ms in pair:
+            if ms not in shared:
+                shared[ms] = new_slot(ms)
+
+    tiers = []
+    for t in range(spec.tiers):
+        rows = []
+        for start, end in grid:
+            if t == 0 or rnd.random() < spec.share:
+                ref1, ref2 = shared[start], shared[end]
+            else:
+                shift = rnd.randint(1, 9)
+                ref1, ref2 = new_slot(start + shift), new_slot(end - shift)
+            label = "".join(rnd.choices(alphabet, k=spec.label_length))
+            rows.append((ref1, ref2, label))
+        tiers.append((f"tier{t + 1}", rows))
+
+    slots.sort(key=lambda kv: kv[1])
+    return slots, tiers
+
+
+def write_corpus(out_dir: Path, spec: CorpusSpec, stem: str = "synthetic") -> dict:
+    """Записать <stem>.eaf, <stem>.short.TextGrid и <stem>.long.TextGrid; вернуть пути."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    slots, tiers = make_tiers(spec)
+
+    eaf_path = out_dir / f"{stem}.eaf"
+    ann_ids = iter(range(1, spec.tiers * spec.annotations + 1))
+    write_eaf_stream(eaf_path, slots, (
+        (name, ((f"a{next(ann_ids)}", EAF.Tier.AlignedAnnotation(label, ref1, ref2, None))
+                for ref1, ref2, label in rows))
+        for name, rows in tiers
+    ))
+
+    ms = dict(slots)
+    max_time = max(ms.values(), default=0) / 1000.0
+    intervals = [(name, [(ms[r1] / 1000.0, ms[r2] / 1000.0, label) for r1, r2, label in rows])
+                 for name, rows in tiers]
+    paths = {"eaf": eaf_path}
+    for mode in ("short", "long"):
+        paths[mode] = out_dir / f"{stem}.{mode}.TextGrid"
+        write_textgrid(paths[mode], intervals, max_time, mode)
+    return paths
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Generate synthetic EAF/TextGrid files")
+    p.add_argument("output", help="output directory")
+    p.add_argument("--tiers", type=int, default=CorpusSpec.tiers)
+    p.add_argument("--annotations", type=int, default=CorpusSpec.annotations,
+                   help="annotations per tier")
+    p.add_argument("--label-length", type=int, default=CorpusSpec.label_length)
+    p.add_argument("--share", type=float, default=CorpusSpec.share,
+                   help="fraction of boundaries shared with the first tier")
+    p.add_argument("--gap", type=float, default=CorpusSpec.gap,
+                   help="probability of a pause between neighbouring annotations")
+    p.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    args = p.parse_args()
+
+    spec = CorpusSpec(args.tiers, args.annotations, args.label_length, args.share,
+                      gap=args.gap, seed=args.seed)
+    for kind, path in write_corpus(Path(args.output), spec).items():
+        print(f"{kind}: {path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Проверка холодного старта: время импорта каждого входного модуля
+в свежем интерпретаторе и список модулей, которые он не должен тянуть.
+
+    python -m benchmarks.import_budget            # код возврата 1 при нарушении
+    python -m benchmarks.import_budget --scale 2  # для медленной машины
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from typing import Dict, FrozenSet, Tuple
+
+# модуль -> (бюджет в мс, модули, которых не должно быть после импорта)
+BUDGETS: Dict[str, Tuple[float, FrozenSet[str]]] = {
+    "converters": (10, frozenset({
+        "xml.etree.ElementTree", "concurrent.futures", "zipfile", "hashlib",
+        "converters.eaf_to_textgrid_core", "converters.textgrid_to_eaf_core",
+    })),
+    "converters.eaf_to_textgrid_wrap": (60, frozenset({
+        "argparse", "concurrent.futures", "zipfile", "urllib.request", "dataclasses",
+        "converters.textgrid_to_eaf_core", "converters.diagnostics", "converters.model",
+        "converters.tierfilter",
+    })),
+    "converters.textgrid_to_eaf_wrap": (80, frozenset({
+        "xml.etree.ElementTree", "xml.sax", "urllib.request",
+        "concurrent.futures", "zipfile", "converters.eaf_to_textgrid_core",
+    })),
+    "converters.cache": (60, frozenset({
+        "concurrent.futures", "zipfile",
+        "converters.eaf_to_textgrid_core", "converters.textgrid_to_eaf_core",
+    })),
+    "converters.batch": (80, frozenset({
+        "concurrent.futures", "zipfile", "tempfile",
+        "converters.eaf_to_textgrid_core", "converters.textgrid_to_eaf_core",
+    })),
+    "converters.cli": (60, frozenset({
+        "concurrent.futures", "zipfile", "converters.batch",
+    })),
+}
+
+
+def import_time_ms(module: str, repeat: int) -> float:
+    """Лучшее из repeat накопленное время импорта по `python -X importtime`."""
+    best = float("inf")
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                best = min(best, int(parts[1]) / 1000)
+    return best
+
+
+def loaded_modules(module: str) -> FrozenSet[str]:
+    proc = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        capture_output=True, text=True, check=True)
+    return frozenset(proc.stdout.split())
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Check import-time budgets of converters modules")
+    p.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    failures = 0
+    for module, (budget, forbidden) in BUDGETS.items():
+        budget *= args.scale
+        spent = import_time_ms(module, args.repeat)
+        leaked = sorted(forbidden & loaded_modules(module))
+
+        ok = spent <= budget and not leaked
+        failures += not ok
+        status = "ok  " if ok else "FAIL"
+        print(f"{status} {module:<36} {spent:6.1f} ms / {budget:.0f} ms"
+              + (f"  лишние импорты: {', '.join(leaked)}" if leaked else ""))
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
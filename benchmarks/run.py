@@ -0,0 +1,115 @@
+"""
+Замеры времени и пиковой памяти по стадиям на синтетических файлах
+разного размера; результат — JSON для сравнения между версиями.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --tiers 10 -o bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from converters import __version__
+from converters import eaf_to_textgrid_core as eaf_core
+from converters import textgrid_to_eaf_core as tg_core
+
+from .generate import CorpusSpec, write_corpus
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Лучшее время из repeat прогонов и пиковая память отдельного прогона."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def stages(paths: Dict[str, Path], out_dir: Path) -> Dict[str, Callable[[], object]]:
+    """Измеряемые стадии; входы для стадий записи готовятся заранее."""
+    tg = tg_core.parse_textgrid(paths["short"])
+    eaf = tg_core.textgrid_to_eaf(tg)
+    return {
+        "eaf_to_textgrid.short": lambda: eaf_core.eaf_to_textgrid(
+            paths["eaf"], out_dir / "out.short.TextGrid", "short"),
+        "eaf_to_textgrid.long": lambda: eaf_core.eaf_to_textgrid(
+            paths["eaf"], out_dir / "out.long.TextGrid", "long"),
+        "parse_textgrid.short": lambda: tg_core.parse_textgrid(paths["short"]),
+        "parse_textgrid.long": lambda: tg_core.parse_textgrid(paths["long"]),
+        "textgrid_to_eaf": lambda: tg_core.textgrid_to_eaf(tg),
+        "write_eaf": lambda: tg_core.write_eaf(out_dir / "out.eaf", eaf),
+    }
+
+
+def run(sizes: List[int], spec: CorpusSpec, repeat: int, only: List[str]) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        for size in sizes:
+            spec.annotations = size
+            paths = write_corpus(tmp_dir, spec)
+            input_bytes = {kind: path.stat().st_size for kind, path in paths.items()}
+
+            for name, fn in stages(paths, tmp_dir).items():
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                row = {"stage": name, "tiers": spec.tiers, "annotations": size,
+                       **measure(fn, repeat)}
+                row["input_bytes"] = input_bytes
+                results.append(row)
+                print(f"{name:<24} n={size:<8} {row['seconds']:8.3f} s "
+                      f"{row['peak_bytes'] / 2 ** 20:8.1f} MB", file=sys.stderr)
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spec": {"tiers": spec.tiers, "label_length": spec.label_length,
+                 "share": spec.share, "gap": spec.gap, "seed": spec.seed},
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark EAF <-> TextGrid conversion stages")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                   help="annotations per tier")
+    p.add_argument("--tiers", type=int, default=CorpusSpec.tiers)
+    p.add_argument("--label-length", type=int, default=CorpusSpec.label_length)
+    p.add_argument("--share", type=float, default=CorpusSpec.share)
+    p.add_argument("--gap", type=float, default=CorpusSpec.gap)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--only", nargs="*", default=[],
+                   help="stage name prefixes to run (default: all)")
+    p.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = p.parse_args()
+
+    spec = CorpusSpec(tiers=args.tiers, label_length=args.label_length, share=args.share,
+                      gap=args.gap)
+    report = json.dumps(run(args.sizes, spec, args.repeat, args.only), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,21 @@
+__version__ = "1.2.0"
+
+
 class ConversionError(RuntimeError):
-    """Единый тип ошибки для конвертеров."""
\ No newline at end of file
+    """Единый тип ошибки для конвертеров."""
+
+
+_SUBMODULES = {
+    "batch", "cache", "cli", "diagnostics", "fileio", "metrics", "model", "reformat",
+    "server", "sync", "tgindex", "tierfilter",
+    "eaf_to_textgrid_core", "eaf_to_textgrid_wrap",
+    "textgrid_to_eaf_core", "textgrid_to_eaf_wrap",
+}
+
+
+def __getattr__(name: str):
+    """Подмодули грузятся при первом обращении: `import converters` ничего не тянет."""
+    if name in _SUBMODULES:
+        import importlib
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,346 @@
+"""
+Пакетная конвертация: сбор файлов по каталогам/маскам и раздача их
+по процессам через ProcessPoolExecutor; пакеты загрузок (в т.ч. ZIP)
+для веб-интерфейса с результатом в одном ZIP.
+
+concurrent.futures, zipfile и tempfile импортируются внутри функций:
+процессы, которым они не нужны, не платят за них при старте.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from . import ConversionError
+from .cache import ConversionCache, convert_bytes, disk_cache
+from .diagnostics import Diagnostics
+from .fileio import base_suffix, binary_writer, split_compression, with_base_suffix
+from .tierfilter import TierFilter
+
+# направление -> (допустимые расширения входа, расширение выхода)
+DIRECTIONS = {
+    "eaf2tg": ({".eaf", ".xml"}, ".TextGrid"),
+    "tg2eaf": ({".textgrid", ".tg"}, ".eaf"),
+    "tg2tg": ({".textgrid", ".tg"}, ".TextGrid"),
+    "eaf2eaf": ({".eaf", ".xml"}, ".eaf"),
+}
+
+_GLOB_CHARS = set("*?[")
+
+
+@dataclass
+class Job:
+    """Один файл: откуда читать и куда писать."""
+    src: Path
+    dst: Path
+
+
+@dataclass
+class BatchResult:
+    """Итог пакетной конвертации."""
+    total: int = 0
+    done: int = 0
+    failed: List[Tuple[Path, str]] = field(default_factory=list)
+    # файлы, сконвертированные с замечаниями (см. converters.diagnostics)
+    warnings: List[Tuple[Path, List[str]]] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def _glob_base(pattern: str) -> Path:
+    """Неизменяемая часть маски: от неё строится зеркальное дерево."""
+    parts: List[str] = []
+    for part in Path(pattern).parts:
+        if _GLOB_CHARS & set(part):
+            break
+        parts.append(part)
+    return Path(*parts) if parts else Path(".")
+
+
+def collect_jobs(inputs: Iterable[str], output_dir: Path, direction: str) -> List[Job]:
+    """
+    Развернуть входы (файлы, каталоги, glob-маски) в список заданий,
+    повторяя структуру подкаталогов внутри output_dir.
+    """
+    import glob
+
+    suffixes, out_suffix = DIRECTIONS[direction]
+    jobs: List[Job] = []
+
+    for item in inputs:
+        path = Path(item).expanduser()
+        if path.is_dir():
+            base = path
+            found = sorted(p for p in path.rglob("*")
+                           if p.is_file() and base_suffix(p) in suffixes)
+        elif path.is_file():
+            base = path.parent
+            found = [path]
+        else:
+            base = _glob_base(str(path))
+            found = sorted(Path(p) for p in glob.glob(str(path), recursive=True)
+                           if Path(p).is_file() and base_suffix(p) in suffixes)
+
+        for src in found:
+            rel = src.relative_to(base)
+            jobs.append(Job(src, with_base_suffix(output_dir / rel, out_suffix)))
+
+    return jobs
+
+
+def _error_text(exc: Exception) -> str:
+    """Текст ошибки файла: ConversionError как есть, прочие — с именем типа."""
+    if isinstance(exc, ConversionError):
+        return str(exc)
+    return f"{type(exc).__name__}: {exc}"
+
+
+def convert_file(direction: str, src: Path, dst: Path, mode: str = "short",
+                 cache_dir: Optional[str] = None, cache_size: int = 0,
+                 metrics_path: Optional[str] = None,
+                 tiers: Optional[TierFilter] = None,
+                 tier_workers: Optional[int] = None) -> Diagnostics:
+    """
+    Конвертировать один файл (выполняется в процессе-воркере).
+    С cache_dir результат берётся из дискового кэша / кладётся в него.
+    С metrics_path запись о конвертации дописывается в этот JSON Lines файл.
+    С tier_workers > 1 уровни самого файла обрабатываются в своём пуле процессов.
+    Возвращает отчёт о замечаниях (при попадании в кэш — сохранённый вместе
+    с результатом; для TextGrid на входе — пустой).
+    """
+    metrics = None
+    if metrics_path is not None:
+        from .metrics import JsonLinesCollector, Metrics
+        metrics = Metrics(sink=JsonLinesCollector(metrics_path))
+
+    report = Diagnostics()
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if cache_dir is not None:
+        cache = disk_cache(cache_dir, cache_size)
+        data = cache.convert(src.read_bytes(), direction, mode, metrics, tiers,
+                             tier_workers, report)
+        with binary_writer(dst) as fh:
+            fh.write(data)
+    elif direction == "eaf2tg":
+        from .eaf_to_textgrid_wrap import convert
+        convert(src, dst, mode=mode, tiers=tiers, metrics=metrics, workers=tier_workers,
+                diagnostics=report)
+    elif direction == "tg2eaf":
+        from .textgrid_to_eaf_wrap import convert
+        convert(src, dst, tiers=tiers, metrics=metrics, workers=tier_workers)
+    elif direction == "tg2tg":
+        from .reformat import reformat_textgrid
+        reformat_textgrid(src, dst, mode=mode, tiers=tiers, metrics=metrics)
+    elif direction == "eaf2eaf":
+        from .reformat import normalize_eaf
+        normalize_eaf(src, dst, tiers=tiers, metrics=metrics, diagnostics=report)
+    else:
+        raise ValueError(f"Неизвестное направление: {direction}")
+    return report
+
+
+def run_batch(
+        jobs: List[Job],
+        direction: str,
+        *,
+        mode: str = "short",
+        workers: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        cache_size: int = 0,
+        metrics_path: Optional[str] = None,
+        tiers: Optional[TierFilter] = None,
+        tier_workers: Optional[int] = None,
+        on_progress: Optional[Callable[[BatchResult, Job, Optional[str]], None]] = None,
+) -> BatchResult:
+    """
+    Прогнать задания через пул процессов. Ошибка в одном файле
+    (ConversionError, OSError, упавший воркер и т. п.) не останавливает
+    остальные, а попадает в result.failed.
+    tier_workers — процессов на уровни внутри одного файла (см. convert_file);
+    полезно, когда файлов мало, а сами они большие.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    result = BatchResult(total=len(jobs))
+    started = time.perf_counter()
+
+    def finish(job: Job, error: Optional[str], report: Optional[Diagnostics] = None) -> None:
+        if error is None:
+            result.done += 1
+            if report:
+                result.warnings.append((job.src, report.lines("error", "warning")))
+        else:
+            result.failed.append((job.src, error))
+        if on_progress is not None:
+            on_progress(result, job, error)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            try:
+                report = convert_file(direction, job.src, job.dst, mode,
+                                      cache_dir, cache_size, metrics_path, tiers, tier_workers)
+            except Exception as exc:
+                finish(job, _error_text(exc))
+            else:
+                finish(job, None, report)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(convert_file, direction, job.src, job.dst, mode,
+                                   cache_dir, cache_size, metrics_path, tiers, tier_workers): job
+                       for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    report = future.result()
+                except Exception as exc:
+                    finish(futures[future], _error_text(exc))
+                else:
+                    finish(futures[future], None, report)
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def print_progress(result: BatchResult, job: Job, error: Optional[str]) -> None:
+    """Сводка в stderr: каждая ошибка и примерно 20 строк прогресса на весь пакет."""
+    if error is not None:
+        print(f"[ERR] {job.src}: {error}", file=sys.stderr)
+    finished = result.done + len(result.failed)
+    step = max(1, result.total // 20)
+    if finished % step == 0 or finished == result.total:
+        print(f"[{finished}/{result.total}] готово: {result.done}, "
+              f"ошибок: {len(result.failed)}", file=sys.stderr)
+
+
+@dataclass
+class Member:
+    """Один входной файл пакета загрузок; байты читаются только по запросу."""
+    name: str
+    load: Callable[[], bytes]
+
+
+def expand_uploads(uploads: Iterable[Tuple[str, BinaryIO]], direction: str) -> List[Member]:
+    """
+    Развернуть загруженные файлы в список входов: обычные файлы берутся
+    как есть, ZIP-архивы — по членам с подходящим расширением.
+    """
+    import zipfile
+
+    suffixes, _ = DIRECTIONS[direction]
+    members: List[Member] = []
+
+    for name, fh in uploads:
+        if PurePosixPath(name).suffix.lower() == ".zip":
+            archive = zipfile.ZipFile(fh)
+            for info in archive.infolist():
+                if not info.is_dir() and base_suffix(PurePosixPath(info.filename)) in suffixes:
+                    members.append(Member(info.filename,
+                                          lambda a=archive, i=info: a.read(i)))
+        elif base_suffix(PurePosixPath(name)) in suffixes:
+            members.append(Member(name, fh.read))
+
+    return members
+
+
+def convert_many(
+        members: List[Member],
+        direction: str,
+        *,
+        mode: Optional[str] = None,
+        workers: Optional[int] = None,
+        cache: Optional[ConversionCache] = None,
+        tiers: Optional[TierFilter] = None,
+) -> Iterator[Tuple[Member, Optional[bytes], Optional[str]]]:
+    """
+    Конвертировать входы на пуле процессов, отдавая (вход, результат, ошибка)
+    по мере готовности. В работе одновременно не больше 2×workers файлов,
+    так что в памяти не копятся все входы сразу. Попадания в cache
+    (ConversionCache) отдаются без обращения к пулу. Любая ошибка файла
+    отдаётся как (вход, None, текст) и не прерывает остальные.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    workers = workers or os.cpu_count() or 1
+    pending = {}
+    queue = iter(members)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while len(pending) < 2 * workers:
+                member = next(queue, None)
+                if member is None:
+                    break
+                try:
+                    data = member.load()
+                    key = cache.key(data, direction, mode, tiers) if cache is not None else None
+                    hit = cache.get(key) if key is not None else None
+                    if hit is None:
+                        future = pool.submit(convert_bytes, data, direction, mode, None, tiers)
+                except Exception as exc:  # битый член ZIP, BrokenProcessPool и т. п.
+                    yield member, None, _error_text(exc)
+                    continue
+                if hit is not None:
+                    yield member, hit, None
+                    continue
+                pending[future] = (member, key)
+
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                member, key = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    yield member, None, _error_text(exc)
+                else:
+                    if key is not None:
+                        cache.put(key, result)
+                    yield member, result, None
+
+
+class ZipResultWriter:
+    """
+    ZIP с результатами, который дописывается по одному файлу по мере
+    готовности. Архив лежит в SpooledTemporaryFile: пока он небольшой —
+    в памяти, крупный уходит во временный файл.
+    """
+
+    def __init__(self, out_suffix: str, spool_size: int = 32 << 20) -> None:
+        import tempfile
+        import zipfile
+
+        self.out_suffix = out_suffix
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        self._zip = zipfile.ZipFile(self._spool, "w", compression=zipfile.ZIP_DEFLATED)
+        self._names: set = set()
+        self.errors: List[Tuple[str, str]] = []
+
+    def _unique(self, name: str) -> str:
+        # в архив результаты кладутся несжатыми: «x.eaf.gz» → «x.TextGrid»
+        path = split_compression(PurePosixPath(name))[0].with_suffix(self.out_suffix)
+        candidate, n = str(path), 1
+        while candidate in self._names:
+            n += 1
+            candidate = str(path.with_name(f"{path.stem}-{n}{path.suffix}"))
+        self._names.add(candidate)
+        return candidate
+
+    def add(self, name: str, data: bytes) -> None:
+        self._zip.writestr(self._unique(name), data)
+
+    def add_error(self, name: str, error: str) -> None:
+        self.errors.append((name, error))
+
+    def close(self) -> BinaryIO:
+        """Дописать errors.txt (если были ошибки) и вернуть архив с начала."""
+        if self.errors:
+            report = "\n".join(f"{name}: {error}" for name, error in self.errors)
+            self._zip.writestr("errors.txt", report + "\n")
+        self._zip.close()
+        self._spool.seek(0)
+        return self._spool
@@ -0,0 +1,232 @@
+"""
+Кэш результатов конвертации по содержимому входа.
+
+Ключ — sha256 входных байтов + направление + режим + версия пакета
+(+ фильтр уровней, если он задан),
+поэтому повторная конвертация того же файла (перезапуск страницы
+Streamlit, повторная загрузка, повторный прогон CLI) ничего не стоит.
+
+Для направлений с отчётом (eaf2tg, eaf2eaf) рядом с результатом хранится
+отчёт converters.diagnostics в JSON: при попадании он восстанавливается,
+и замечания не пропадают из-за того, что файл уже конвертировался.
+
+Два уровня:
+  * в памяти — LRU, ограниченный суммарным размером результатов;
+  * на диске (по желанию) — каталог с файлами, старые вытесняются
+    по времени последнего использования, когда каталог превышает лимит.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from . import __version__
+
+if TYPE_CHECKING:
+    from .diagnostics import Diagnostics
+    from .metrics import Metrics
+    from .tierfilter import TierFilter
+
+MB = 1 << 20
+
+REPORTING_DIRECTIONS = ("eaf2tg", "eaf2eaf")
+REPORT_SUFFIX = "-diagnostics"
+
+
+def convert_bytes(data: bytes, direction: str, mode: Optional[str] = None,
+                  metrics: Optional[Metrics] = None,
+                  tiers: Optional[TierFilter] = None,
+                  workers: Optional[int] = None,
+                  diagnostics: Optional[Diagnostics] = None) -> bytes:
+    """
+    Конвертация в памяти по имени направления ("eaf2tg" / "tg2eaf", а также
+    "tg2tg" и "eaf2eaf" — см. converters.reformat).
+    workers > 1 — уровни файла обрабатываются в пуле процессов (eaf2tg, tg2eaf).
+    diagnostics заполняется для eaf2tg и eaf2eaf.
+    """
+    if direction == "eaf2tg":
+        from .eaf_to_textgrid_wrap import convert_bytes
+        return convert_bytes(data, mode=mode or "short", tiers=tiers, metrics=metrics,
+                             workers=workers, diagnostics=diagnostics)
+    if direction == "tg2eaf":
+        from .textgrid_to_eaf_wrap import convert_bytes
+        return convert_bytes(data, mode=mode, tiers=tiers, metrics=metrics,
+                             workers=workers)
+    if direction == "tg2tg":
+        from .reformat import reformat_textgrid_bytes
+        return reformat_textgrid_bytes(data, mode=mode or "short", tiers=tiers, metrics=metrics)
+    if direction == "eaf2eaf":
+        from .reformat import normalize_eaf_bytes
+        return normalize_eaf_bytes(data, tiers=tiers, metrics=metrics, diagnostics=diagnostics)
+    raise ValueError(f"Неизвестное направление: {direction}")
+
+
+class ConversionCache:
+    """
+    Кэш «вход + направление + режим → результат».
+
+    Args:
+        max_memory: Лимит памяти для LRU в байтах (0 — без уровня в памяти).
+        disk_dir: Каталог дискового уровня (None — без него).
+        max_disk: Лимит размера дискового каталога в байтах.
+    """
+
+    def __init__(self, max_memory: int = 128 * MB,
+                 disk_dir: str | Path | None = None,
+                 max_disk: int = 1024 * MB) -> None:
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.disk_dir = Path(disk_dir).expanduser() if disk_dir is not None else None
+
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+        self._disk_size = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_size = sum(p.stat().st_size for p in self._disk_entries())
+
+    @staticmethod
+    def key(data: bytes, direction: str, mode: Optional[str] = None,
+            tiers: Optional[TierFilter] = None) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        key = f"{digest}-{direction}-{mode or 'auto'}-{__version__}"
+        if tiers is not None:
+            key += "-" + hashlib.sha256(tiers.key().encode()).hexdigest()[:16]
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            value = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        self._remember(key, value)
+
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(value)
+        os.replace(tmp, path)
+
+        self._disk_size += len(value)
+        if self._disk_size > self.max_disk:
+            self._evict_disk()
+
+    def convert(self, data: bytes, direction: str, mode: Optional[str] = None,
+                metrics: Optional[Metrics] = None,
+                tiers: Optional[TierFilter] = None,
+                workers: Optional[int] = None,
+                diagnostics: Optional[Diagnostics] = None) -> bytes:
+        """
+        Результат из кэша или свежая конвертация (ConversionError не кэшируется).
+        metrics заполняются только при промахе, diagnostics — всегда: при
+        попадании отчёт берётся из кэша. Если отчёт вытеснен отдельно
+        от результата, файл конвертируется заново. workers на результат
+        не влияет и в ключ не входит.
+        """
+        import json
+
+        from .diagnostics import Diagnostics
+
+        key = self.key(data, direction, mode, tiers)
+        reporting = direction in REPORTING_DIRECTIONS
+        value = self.get(key)
+        stored = None
+        if value is not None and reporting and diagnostics is not None:
+            stored = self.get(key + REPORT_SUFFIX)
+            if stored is None:
+                value = None
+
+        if value is None:
+            # отчёт собирается и без diagnostics — для следующих попаданий
+            report = Diagnostics() if reporting else None
+            try:
+                value = convert_bytes(data, direction, mode, metrics, tiers, workers, report)
+            finally:
+                if report is not None and diagnostics is not None:
+                    diagnostics.merge(report)
+            self.put(key, value)
+            if report is not None:
+                self.put(key + REPORT_SUFFIX, json.dumps(report.to_json()).encode())
+        elif stored is not None:
+            diagnostics.merge(Diagnostics.from_json(json.loads(stored)))
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+    def _remember(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_memory:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= len(old)
+            self._memory[key] = value
+            self._memory_size += len(value)
+            while self._memory_size > self.max_memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / key
+
+    def _disk_entries(self) -> list[Path]:
+        return [p for p in self.disk_dir.glob("??/*") if not p.name.endswith(".tmp")]
+
+    def _evict_disk(self) -> None:
+        """Удалить давно не использованные записи, пока каталог не станет ≤ 90% лимита."""
+        entries = []
+        for path in self._disk_entries():
+            try:
+                st = path.stat()
+            except FileNotFoundError:  # удалил другой процесс
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._disk_size = total
+
+
+@lru_cache(maxsize=None)
+def default_cache() -> ConversionCache:
+    """Общий кэш процесса в памяти (для страниц Streamlit)."""
+    return ConversionCache()
+
+
+@lru_cache(maxsize=None)
+def disk_cache(disk_dir: str, max_disk: int) -> ConversionCache:
+    """Дисковый кэш для CLI: один экземпляр на процесс и каталог."""
+    return ConversionCache(max_memory=0, disk_dir=disk_dir, max_disk=max_disk)
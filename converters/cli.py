@@ -0,0 +1,167 @@
+"""
+Командная строка: пакетная конвертация в обе стороны и внутри формата.
+
+    python -m converters eaf2tg corpus/ -o out/ --mode long -j 32
+    python -m converters tg2eaf "data/**/*.TextGrid" -o eaf/ --cache-dir ~/.cache/converters
+    python -m converters eaf2tg corpus/ -o out/ --metrics metrics.jsonl
+    python -m converters tg2eaf huge.TextGrid -o eaf/ -j 1 --tier-jobs 8
+    python -m converters tg2tg data/ -o long/ --mode long
+    python -m converters eaf2eaf corpus/ -o normalized/
+    python -m converters sync eaf2tg corpus/ -o out/ --watch
+    python -m converters eaf2tg corpus/ -o out/ --include words --include "words@.*"
+    python -m converters serve --port 8765 -j 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+TEXTGRID_MODES = ("short", "long", "binary")
+
+
+def _add_common(sp: argparse.ArgumentParser) -> None:
+    sp.add_argument("inputs", nargs="+",
+                    help="files, directories or glob patterns")
+    sp.add_argument("-o", "--output", required=True,
+                    help="output directory (input tree is mirrored)")
+    sp.add_argument("-j", "--jobs", type=int, default=None,
+                    help="worker processes (default: CPU count)")
+    sp.add_argument("--cache-dir", default=None,
+                    help="on-disk conversion cache keyed by input content")
+    sp.add_argument("--cache-size", type=int, default=1024,
+                    help="cache size limit in MB (default: 1024)")
+    sp.add_argument("--include", action="append", default=None, metavar="TIER",
+                    help="convert only tiers matching this name or regex (repeatable)")
+    sp.add_argument("--exclude", action="append", default=None, metavar="TIER",
+                    help="skip tiers matching this name or regex (repeatable)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="converters",
+                                description="Batch EAF <-> TextGrid conversion")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("eaf2tg", "convert .eaf/.xml to .TextGrid"),
+                            ("tg2eaf", "convert .TextGrid/.tg to .eaf"),
+                            ("tg2tg", "rewrite .TextGrid in another format (short/long/binary)"),
+                            ("eaf2eaf", "normalize .eaf: ordered time slots, sequential IDs")):
+        sp = sub.add_parser(name, help=help_text)
+        sp.set_defaults(direction=name, tier_jobs=None)
+        _add_common(sp)
+        sp.add_argument("--metrics", default=None, metavar="FILE",
+                        help="append per-file stage timings to FILE as JSON lines")
+        if name in ("eaf2tg", "tg2eaf"):
+            sp.add_argument("--tier-jobs", type=int, default=None, metavar="N",
+                            help="process the tiers of each file in N worker processes "
+                                 "(for a few very large files; combine with -j 1)")
+        if name in ("eaf2tg", "tg2tg"):
+            sp.add_argument("--mode", choices=TEXTGRID_MODES, default="short",
+                            help="TextGrid format")
+
+    sp = sub.add_parser("sync", help="reconvert only new and changed files, "
+                                     "delete outputs of removed sources")
+    sp.add_argument("direction", choices=("eaf2tg", "tg2eaf", "tg2tg", "eaf2eaf"))
+    _add_common(sp)
+    sp.add_argument("--mode", choices=TEXTGRID_MODES, default=None,
+                    help="TextGrid format for eaf2tg and tg2tg (default: short)")
+    sp.add_argument("--manifest", default=None,
+                    help="manifest path (default: OUTPUT/.converters-manifest.json)")
+    sp.add_argument("--watch", action="store_true",
+                    help="keep running and resync every --interval seconds")
+    sp.add_argument("--interval", type=float, default=10.0,
+                    help="seconds between passes in --watch mode (default: 10)")
+
+    sp = sub.add_parser("serve", help="run a local HTTP conversion service")
+    sp.add_argument("--host", default="127.0.0.1", help="bind address (default: 127.0.0.1)")
+    sp.add_argument("--port", type=int, default=8765, help="port (default: 8765)")
+    sp.add_argument("-j", "--jobs", type=int, default=None,
+                    help="worker processes (default: CPU count)")
+    sp.add_argument("--max-pending", type=int, default=None,
+                    help="requests converting or waiting for a worker before "
+                         "answering 503 (default: 4 x jobs)")
+    sp.add_argument("--max-body", type=int, default=64,
+                    help="request body limit in MB (default: 64)")
+    sp.add_argument("--timeout", type=float, default=30.0,
+                    help="seconds to receive a request (default: 30)")
+    sp.add_argument("--cache-size", type=int, default=128,
+                    help="in-memory result cache in MB, 0 disables (default: 128)")
+    sp.add_argument("--cache-dir", default=None,
+                    help="also keep results in an on-disk cache")
+    return p
+
+
+def _tier_filter(args: argparse.Namespace):
+    from .tierfilter import TierFilter
+    return TierFilter.build(args.include, args.exclude)
+
+
+def _sync(args: argparse.Namespace) -> int:
+    from . import sync
+    from .cache import MB
+
+    mode = (args.mode or "short") if args.direction in ("eaf2tg", "tg2tg") else None
+    options = dict(mode=mode, workers=args.jobs, manifest=args.manifest,
+                   cache_dir=args.cache_dir, cache_size=args.cache_size * MB,
+                   tiers=_tier_filter(args))
+    output = Path(args.output).expanduser()
+
+    if args.watch:
+        sync.watch(args.inputs, output, args.direction, interval=args.interval, **options)
+        return 0
+    result = sync.sync(args.inputs, output, args.direction, **options)
+    sync.print_summary(result)
+    return 1 if result.failed else 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from .cache import MB, ConversionCache
+    from .server import serve
+
+    cache = None
+    if args.cache_size > 0 or args.cache_dir:
+        cache = ConversionCache(max_memory=args.cache_size * MB, disk_dir=args.cache_dir)
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.jobs,
+                          max_pending=args.max_pending, max_body=args.max_body * MB,
+                          timeout=args.timeout, cache=cache))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "sync":
+        return _sync(args)
+    if args.command == "serve":
+        return _serve(args)
+
+    from . import batch
+    from .cache import MB
+
+    jobs = batch.collect_jobs(args.inputs, Path(args.output).expanduser(), args.direction)
+    if not jobs:
+        print("Нет подходящих файлов", file=sys.stderr)
+        return 1
+
+    result = batch.run_batch(jobs, args.direction,
+                             mode=getattr(args, "mode", "short"),
+                             workers=args.jobs,
+                             cache_dir=args.cache_dir,
+                             cache_size=args.cache_size * MB,
+                             metrics_path=args.metrics,
+                             tiers=_tier_filter(args),
+                             tier_workers=args.tier_jobs,
+                             on_progress=batch.print_progress)
+
+    for src, lines in result.warnings:
+        for line in lines:
+            print(f"[WARN] {src}: {line}", file=sys.stderr)
+    print(f"Готово за {result.seconds:.1f} с: {result.done} из {result.total}, "
+          f"ошибок: {len(result.failed)}", file=sys.stderr)
+    return 1 if result.failed else 0
@@ -0,0 +1,151 @@
+"""
+Диагностика интервалов при конвертации EAF → TextGrid: вместо строки
+в stderr на каждую битую аннотацию — один сводный отчёт по уровням.
+
+    report = Diagnostics()
+    convert(src, dst, mode="long", diagnostics=report)
+    for line in report.lines():
+        print(line)
+
+Виды замечаний (KINDS):
+  * unknown_slot, unresolved_ref — аннотация без времени, в TextGrid не попала;
+  * empty — аннотация нулевой длины (например, два TIME_SLOT с одним
+    TIME_VALUE): Praat такой интервал не откроет, в TextGrid она не попадает;
+  * overlap, out_of_range — такой уровень в TextGrid записать нельзя,
+    конвертация останавливается до записи (raise_for_errors);
+  * gap — паузы между аннотациями, дополненные пустыми интервалами.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Interval = Tuple[float, float, str]
+
+# вид -> (серьёзность, описание)
+KINDS = {
+    "unknown_slot": ("warning", "неизвестный TIME_SLOT_ID, аннотация пропущена"),
+    "unresolved_ref": ("warning", "не удалось определить время ссылочной аннотации, "
+                                  "аннотация пропущена"),
+    "empty": ("warning", "интервал нулевой длины, аннотация пропущена"),
+    "overlap": ("error", "пересекающиеся интервалы"),
+    "out_of_range": ("error", "граница вне файла"),
+    "gap": ("info", "паузы дополнены пустыми интервалами"),
+}
+
+MAX_EXAMPLES = 3  # примеров на уровень и вид; остальное только считается
+
+
+@dataclass
+class Issue:
+    """Замечания одного вида на одном уровне."""
+    kind: str
+    tier: str
+    count: int = 0
+    examples: List[str] = field(default_factory=list)
+
+    @property
+    def severity(self) -> str:
+        return KINDS[self.kind][0]
+
+    def __str__(self) -> str:
+        text = f"уровень {self.tier!r}: {KINDS[self.kind][1]} — {self.count}"
+        if self.examples:
+            more = ", …" if self.count > len(self.examples) else ""
+            text += f" ({', '.join(self.examples)}{more})"
+        return text
+
+
+class Diagnostics:
+    """Сводный отчёт: счётчики и несколько примеров на (вид, уровень)."""
+
+    def __init__(self) -> None:
+        self.issues: Dict[Tuple[str, str], Issue] = {}
+
+    def add(self, kind: str, tier: str, example: Optional[str] = None,
+            count: int = 1) -> None:
+        issue = self.issues.get((kind, tier))
+        if issue is None:
+            issue = self.issues[kind, tier] = Issue(kind, tier)
+        issue.count += count
+        if example is not None and len(issue.examples) < MAX_EXAMPLES:
+            issue.examples.append(example)
+
+    def merge(self, other: 'Diagnostics') -> None:
+        """Добавить отчёт другого процесса (параллельная конвертация)."""
+        for issue in other.issues.values():
+            self.add(issue.kind, issue.tier, count=issue.count)
+            mine = self.issues[issue.kind, issue.tier]
+            mine.examples.extend(issue.examples[:MAX_EXAMPLES - len(mine.examples)])
+
+    def count(self, kind: Optional[str] = None) -> int:
+        return sum(issue.count for issue in self.issues.values()
+                   if kind is None or issue.kind == kind)
+
+    def select(self, *severities: str) -> List[Issue]:
+        return [issue for issue in self.issues.values() if issue.severity in severities]
+
+    @property
+    def errors(self) -> List[Issue]:
+        return self.select("error")
+
+    @property
+    def problems(self) -> List[Issue]:
+        """Ошибки и предупреждения, без справочных gap."""
+        return self.select("error", "warning")
+
+    def lines(self, *severities: str) -> List[str]:
+        issues = self.select(*severities) if severities else list(self.issues.values())
+        return [str(issue) for issue in issues]
+
+    def raise_for_errors(self) -> None:
+        """ValueError со всеми ошибками сразу, если они есть."""
+        if self.errors:
+            raise ValueError("; ".join(self.lines("error")))
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        return [{"kind": issue.kind, "severity": issue.severity, "tier": issue.tier,
+                 "count": issue.count, "examples": issue.examples}
+                for issue in self.issues.values()]
+
+    @classmethod
+    def from_json(cls, items: List[Dict[str, Any]]) -> 'Diagnostics':
+        """Обратно из to_json (например, отчёт из кэша)."""
+        report = cls()
+        for item in items:
+            report.issues[item["kind"], item["tier"]] = Issue(
+                item["kind"], item["tier"], item["count"], list(item["examples"]))
+        return report
+
+    def __bool__(self) -> bool:
+        return bool(self.problems)
+
+
+def check_intervals(tier: str, intervals: Sequence[Interval], min_time: float,
+                    max_time: float, report: Diagnostics) -> None:
+    """
+    Один проход по интервалам уровня, отсортированным по началу
+    (так их отдают to_intervals и EafReader.intervals): пересечения
+    с любым из предыдущих интервалов, паузы и границы вне [min_time, max_time].
+    Интервалы нулевой длины отмечаются как empty и дальше не проверяются —
+    fill_gaps их не записывает.
+    """
+    cursor = min_time  # самый поздний конец среди просмотренных
+    gaps = 0
+    for start, end, text in intervals:
+        if end <= start:
+            report.add("empty", tier, f"{start}–{end} {text!r}")
+            continue
+        if start < min_time or end > max_time:
+            report.add("out_of_range", tier, f"{start}–{end} {text!r}")
+        if start < cursor and cursor > min_time:
+            report.add("overlap", tier, f"{start} < {cursor} {text!r}")
+        elif start > cursor:
+            gaps += 1
+        if end > cursor:
+            cursor = end
+    if cursor < max_time or not intervals:
+        gaps += 1
+    if gaps:
+        report.add("gap", tier, count=gaps)
@@ -1,118 +1,511 @@
 from __future__ import annotations
 
-import argparse
 import sys
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Tuple, Union
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree as ET
 
-import pympi
-from praatio import textgrid
+from .fileio import Dest, Source, binary_reader, binary_writer, is_path, text_writer
+from .metrics import Metrics, stage
+
+# diagnostics, model и tierfilter тянут dataclasses (и через него inspect):
+# они импортируются в функциях, чтобы не удлинять холодный старт обёртки
+if TYPE_CHECKING:
+    from .diagnostics import Diagnostics
+    from .model import Interval, TextGrid, TierIntervals
+    from .tierfilter import TierFilter
 
 TimeSlotMap = Dict[str, float]  # id тайм-слота  ->  секунд
-Interval = Tuple[float, float, str]
+RawAnnotation = Tuple[str, str, str]  # id слота, id слота, текст
+RefRow = Tuple[str, str]  # id аннотации, текст (время — у родителя)
+
+TEXTGRID_MODES = ("short", "long", "binary")
+
 
+def read_time_order(elem: ET.Element) -> Dict[str, int]:
+    """Словарь «tsID → миллисекунды»; слоты без TIME_VALUE пропускаются."""
+    slots: Dict[str, int] = {}
+    for ts in elem.iter("TIME_SLOT"):
+        value = ts.get("TIME_VALUE")
+        if value:
+            slots[ts.get("TIME_SLOT_ID", "")] = int(value)
+    return slots
 
-def build_ts_map(eaf: pympi.Elan.Eaf) -> TimeSlotMap:
+
+def build_ts_map(time_slots: Dict[str, int]) -> TimeSlotMap:
     """Словарь «tsID → секунды»."""
-    return {str(ts_id): ms / 1000.0 for ts_id, ms in eaf.timeslots.items()}
+    return {ts_id: ms / 1000.0 for ts_id, ms in time_slots.items()}
+
 
+class RefRows(list):
+    """Строки уровня из REF_ANNOTATION; время вычисляет EafReader.intervals()."""
 
-def _ms_or_slot(value: Union[str, int, float]) -> Union[str, float]:
+
+class EafReader:
     """
-    Если value похоже на число (в миллисекундах), вернуть его как float/секунды.
-    Иначе вернуть как str (будем искать в карте тайм-слотов).
+    Потоковое чтение EAF через iterparse, без pympi.
+
+    TIME_ORDER читается в словарь «tsID → мс», затем уровни отдаются
+    по одному; каждый ANNOTATION освобождается сразу после разбора.
+
+    Зависимые уровни (REF_ANNOTATION: Symbolic_Association и
+    Symbolic_Subdivision) разрешаются через индекс «ID аннотации →
+    родитель», который строится по ходу того же прохода: аннотация
+    получает интервал родителя, а k-я из n «сестёр» (по цепочке
+    PREVIOUS_ANNOTATION) — его k-ю долю. Если родитель встречается
+    в файле позже зависимого уровня, этот и следующие уровни
+    отдаются в конце документа, порядок уровней сохраняется.
+
+    Уровни, не прошедшие фильтр tiers, не отдаются: их аннотации не
+    собираются и текст не читается, в индекс попадают только ссылки
+    на тайм-слоты (они нужны зависимым уровням).
     """
-    try:
-        ms = float(value)
-        if ms.is_integer() or ms > 50:  # примитивная проверка, но работает
-            return ms / 1000.0
-    except (TypeError, ValueError):
-        pass
-    return str(value)
 
+    def __init__(self, source: Source, tiers: Optional[TierFilter] = None) -> None:
+        self.source = source
+        self.filter = tiers
+        self.time_slots: Dict[str, int] = {}
+        self.ts_map: TimeSlotMap = {}
+        # ID выравниваемой аннотации -> её строка (та же, что в raw)
+        self._aligned: Dict[str, RawAnnotation] = {}
+        # ID ссылочной аннотации -> (ID родителя, номер среди сестёр, число сестёр)
+        self._refs: Dict[str, Tuple[str, int, int]] = {}
+        self._ref_ms: Dict[str, Optional[Tuple[int, int]]] = {}
+
+    @property
+    def max_time(self) -> float:
+        return max(self.ts_map.values(), default=0.0)
+
+    def iter_raw_tiers(self) -> Iterator[Tuple[str, List[RawAnnotation] | RefRows]]:
+        """
+        Уровни в порядке файла: (TIER_ID, [(ts1, ts2, текст), ...]) для
+        выравниваемых и (TIER_ID, RefRows) для зависимых уровней.
+        """
+        raw: List[RawAnnotation] = []
+        refs: List[Tuple[str, str, Optional[str], str]] = []
+        pending: List[Tuple[str, List[RawAnnotation] | RefRows]] = []
+        aligned = self._aligned
+        selected = self.filter
+        keep = True
+        root = None
+
+        with binary_reader(self.source) as fh:
+            for event, elem in ET.iterparse(fh, events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    elif elem.tag == "TIER":
+                        raw, refs = [], []
+                        keep = selected is None or selected(elem.get("TIER_ID", ""))
+                    continue
+
+                if elem.tag == "TIME_ORDER":
+                    self.time_slots = read_time_order(elem)
+                    self.ts_map = build_ts_map(self.time_slots)
+                    root.clear()
+                elif elem.tag == "ALIGNABLE_ANNOTATION":
+                    row = (elem.get("TIME_SLOT_REF1", ""),
+                           elem.get("TIME_SLOT_REF2", ""),
+                           (elem.findtext("ANNOTATION_VALUE") or "") if keep else "")
+                    if keep:
+                        raw.append(row)
+                    aligned[elem.get("ANNOTATION_ID", "")] = row
+                elif elem.tag == "REF_ANNOTATION":
+                    refs.append((elem.get("ANNOTATION_ID", ""),
+                                 elem.get("ANNOTATION_REF", ""),
+                                 elem.get("PREVIOUS_ANNOTATION"),
+                                 (elem.findtext("ANNOTATION_VALUE") or "") if keep else ""))
+                elif elem.tag == "ANNOTATION":
+                    elem.clear()
+                elif elem.tag == "TIER":
+                    tier_id = elem.get("TIER_ID", "")
+                    root.clear()
+                    rows = self._index_refs(refs) if refs else raw
+                    if not keep:
+                        continue
+                    item = (tier_id, rows)
+                    if pending or any(parent not in aligned and parent not in self._refs
+                                      for _, parent, _, _ in refs):
+                        pending.append(item)
+                    else:
+                        yield item
+
+        yield from pending
+
+    def _index_refs(self, refs: List[Tuple[str, str, Optional[str], str]]) -> RefRows:
+        """Запомнить родителя и место среди сестёр для каждой аннотации уровня."""
+        siblings: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        for ann_id, parent, prev, _ in refs:
+            siblings.setdefault(parent, []).append((ann_id, prev))
+
+        for parent, group in siblings.items():
+            for k, ann_id in enumerate(_chain_order(group)):
+                self._refs[ann_id] = (parent, k, len(group))
+
+        return RefRows((ann_id, text) for ann_id, _, _, text in refs)
+
+    def _ms(self, ann_id: str) -> Optional[Tuple[int, int]]:
+        """Интервал аннотации в мс (начало ≤ конец) или None, если его нет."""
+        row = self._aligned.get(ann_id)
+        if row is not None:
+            start, end = self.time_slots.get(row[0]), self.time_slots.get(row[1])
+            if start is None or end is None:
+                return None
+            return (start, end) if start <= end else (end, start)
+
+        if ann_id in self._ref_ms:
+            return self._ref_ms[ann_id]
+        self._ref_ms[ann_id] = None  # защита от циклических ссылок
 
-def iter_annotations(raw_ann) -> Iterable[Sequence]:
+        ref = self._refs.get(ann_id)
+        span = self._ms(ref[0]) if ref is not None else None
+        if span is not None:
+            _, k, n = ref
+            start, end = span
+            span = (start + (end - start) * k // n,
+                    start + (end - start) * (k + 1) // n)
+        self._ref_ms[ann_id] = span
+        return span
+
+    def intervals(self, raw: List[RawAnnotation] | RefRows,
+                  report: Optional[Diagnostics] = None, tier: str = "") -> List[Interval]:
+        """
+        Строки уровня из iter_raw_tiers() → (начало, конец, текст) в секундах.
+        Аннотации без времени пропускаются и учитываются в report.
+        """
+        if not isinstance(raw, RefRows):
+            return to_intervals(raw, self.ts_map, report, tier)
+
+        intervals: List[Interval] = []
+        for ann_id, text in raw:
+            span = self._ms(ann_id)
+            if span is None:
+                if report is not None:
+                    report.add("unresolved_ref", tier,
+                               f"{ann_id!r} → {self._refs[ann_id][0]!r}")
+                continue
+            intervals.append((span[0] / 1000.0, span[1] / 1000.0, text.strip()))
+
+        intervals.sort(key=itemgetter(0))
+        return intervals
+
+    def iter_tiers(self, report: Optional[Diagnostics] = None) -> Iterator[TierIntervals]:
+        """Уровни как (TIER_ID, [(начало, конец, текст), ...]) в секундах."""
+        for tier_id, raw in self.iter_raw_tiers():
+            yield tier_id, self.intervals(raw, report, tier_id)
+
+
+def read_eaf(source: Source, tiers: Optional[TierFilter] = None,
+             report: Optional[Diagnostics] = None) -> TextGrid:
+    """
+    EAF в общую модель (model.TextGrid): каждый уровень — интервальный,
+    в секундах, ссылочные аннотации уже получили время родителя.
+    Аннотации без времени пропускаются и учитываются в report.
+    """
+    from .model import TextGrid, num_to_str
+
+    reader = EafReader(source, tiers)
+    tg = TextGrid()
+    for name, intervals in reader.iter_tiers(report):
+        tg.tiers.append(TextGrid.IntervalTier.from_intervals(name, intervals))
+    tg.xmin, tg.xmax = "0", num_to_str(reader.max_time)
+    for tier in tg.tiers:
+        tier.start, tier.end = tg.xmin, tg.xmax
+    return tg
+
+
+def _chain_order(group: List[Tuple[str, Optional[str]]]) -> List[str]:
     """
-    Привести raw_ann к последовательности
-    (start_any, end_any, text), где start/end могут быть:
-        float — уже секунды,
-        str   — id тайм-слота ('ts3').
+    Порядок сестёр по цепочке PREVIOUS_ANNOTATION; аннотации вне цепочки
+    (битые ссылки) идут следом в порядке файла.
     """
-    raw_iter = raw_ann.values() if isinstance(raw_ann, dict) else raw_ann
+    if len(group) == 1:
+        return [group[0][0]]
 
-    for ann in raw_iter:
-        if len(ann) == 3:
-            start, end, text = ann
-        elif len(ann) >= 4:
-            _, start, end, text = ann[:4]
-        else:
+    ids = {ann_id for ann_id, _ in group}
+    following = {prev: ann_id for ann_id, prev in group if prev in ids}
+    order: List[str] = []
+    seen = set()
+    for ann_id, prev in group:
+        if prev in ids:
             continue
-        yield _ms_or_slot(start), _ms_or_slot(end), text or ""
+        while ann_id is not None and ann_id not in seen:
+            order.append(ann_id)
+            seen.add(ann_id)
+            ann_id = following.get(ann_id)
+    order.extend(ann_id for ann_id, _ in group if ann_id not in seen)
+    return order
 
 
 def to_intervals(
-        ann_iter: Iterable[Sequence], ts_map: TimeSlotMap
+        ann_iter: Iterable[RawAnnotation], ts_map: TimeSlotMap,
+        report: Optional[Diagnostics] = None, tier: str = "",
 ) -> List[Interval]:
-    """Преобразовать кортежи в итоговые интервалы (секунды, секунды, текст)."""
+    """
+    Преобразовать кортежи в итоговые интервалы (секунды, секунды, текст).
+
+    Уровни ELAN почти всегда уже упорядочены по времени, поэтому порядок
+    проверяется по ходу цикла, а сортировка (устойчивая, по началу)
+    выполняется только если он нарушен. Аннотации с неизвестным
+    тайм-слотом пропускаются и учитываются в report (уровень tier).
+    """
     intervals: List[Interval] = []
+    append = intervals.append
+    ordered = True
+    last = float("-inf")
 
     for start_raw, end_raw, text in ann_iter:
-
-        if isinstance(start_raw, float) and isinstance(end_raw, float):
-            start_sec, end_sec = start_raw, end_raw
-        else:
-            try:
-                start_sec = ts_map[str(start_raw)]
-                end_sec = ts_map[str(end_raw)]
-            except KeyError:
-                print(f"[WARN]  неизвестный TIME_SLOT_ID "
-                      f"{start_raw!r} / {end_raw!r}", file=sys.stderr)
-                continue
+        try:
+            start_sec = ts_map[start_raw]
+            end_sec = ts_map[end_raw]
+        except KeyError:
+            if report is not None:
+                report.add("unknown_slot", tier, f"{start_raw!r} / {end_raw!r}")
+            continue
 
         if end_sec < start_sec:
             start_sec, end_sec = end_sec, start_sec
+        if start_sec < last:
+            ordered = False
+        last = start_sec
+
+        append((start_sec, end_sec, text.strip()))
+
+    if not ordered:
+        intervals.sort(key=itemgetter(0))
+    return intervals
 
-        intervals.append((start_sec, end_sec, text.strip()))
 
-    return sorted(intervals, key=lambda it: it[0])
+def fill_gaps(
+        intervals: Sequence[Interval], min_time: float, max_time: float
+) -> Iterator[Interval]:
+    """
+    Дополнить отсортированные интервалы пустыми так, чтобы уровень
+    покрывал [min_time, max_time] без дыр (как includeEmptyIntervals).
+    Интервалы нулевой длины пропускаются: Praat и praatio не открывают
+    TextGrid с ними (в отчёте это empty, см. check_intervals).
+    """
+    cursor = min_time
+    for start, end, text in intervals:
+        if end <= start:
+            continue
+        if start < cursor:
+            raise ValueError(f"пересекающиеся интервалы: "
+                             f"{start} < {cursor} ({text!r})")
+        if start > cursor:
+            yield cursor, start, ""
+        yield start, end, text
+        cursor = end
+    if cursor < max_time or not intervals:
+        yield cursor, max_time, ""
+
+
+def _file_header(mode: str, size: int, min_time: float, max_time: float) -> str | bytes:
+    if mode == "binary":
+        from .textgrid_to_eaf_core import binary_header
+        return binary_header(min_time, max_time, size)
+    from .model import num_to_str, text_header
+    return text_header(mode, num_to_str(min_time), num_to_str(max_time), size)
+
+
+def _text_tier(mode: str, tier_num: int, name: str, intervals: Sequence[Interval],
+               min_time: float, max_time: float) -> Iterator[str]:
+    from .model import interval_tier_text, num_to_str
+
+    entries = list(fill_gaps(intervals, min_time, max_time))
+    return interval_tier_text(mode, tier_num, name, num_to_str(min_time),
+                              num_to_str(max_time), len(entries), entries)
+
+
+def _binary_tier(name: str, intervals: Sequence[Interval],
+                 min_time: float, max_time: float) -> Iterator[bytes]:
+    from .textgrid_to_eaf_core import binary_intervals, binary_tier_header
 
+    entries = list(fill_gaps(intervals, min_time, max_time))
+    yield binary_tier_header("IntervalTier", name, min_time, max_time, len(entries))
+    yield binary_intervals(entries)
 
-def eaf_to_textgrid(eaf_path: Path, tg_path: Path) -> None:
-    if not eaf_path.is_file():
+
+def tier_chunks(mode: str, tier_num: int, name: str, intervals: Sequence[Interval],
+                min_time: float, max_time: float) -> Iterator[str | bytes]:
+    """Текст (или байты для binary) одного уровня; tier_num считается с 1."""
+    if mode == "binary":
+        return _binary_tier(name, intervals, min_time, max_time)
+    return _text_tier(mode, tier_num, name, intervals, min_time, max_time)
+
+
+def write_textgrid(
+        tg_path: Dest,
+        tiers: Sequence[TierIntervals],
+        max_time: float,
+        mode: str = "short",
+) -> None:
+    """
+    Записать интервалы сразу в short/long/binary TextGrid за один проход,
+    без промежуточных объектов praatio и повторного чтения файла.
+    """
+    if mode not in TEXTGRID_MODES:
+        raise ValueError(f"Неизвестный режим: {mode}")
+
+    with (binary_writer if mode == "binary" else text_writer)(tg_path) as fh:
+        fh.write(_file_header(mode, len(tiers), 0.0, max_time))
+        for tier_num, (name, intervals) in enumerate(tiers, start=1):
+            fh.writelines(tier_chunks(mode, tier_num, name, intervals, 0.0, max_time))
+
+
+def eaf_to_textgrid(eaf_path: Source, tg_path: Dest, mode: str = "short",
+                    *, tiers: Optional[TierFilter] = None,
+                    metrics: Optional[Metrics] = None,
+                    workers: Optional[int] = None,
+                    diagnostics: Optional[Diagnostics] = None) -> None:
+    """
+    Путь или бинарный поток .eaf → путь или бинарный поток .TextGrid.
+    С tiers в TextGrid попадают только выбранные уровни.
+    С metrics время делится на стадии parse / normalize / serialize.
+    С workers > 1 уровни нормализуются и сериализуются параллельно
+    (см. _eaf_to_textgrid_parallel); результат тот же, байт в байт.
+    diagnostics получает сводку по пропущенным аннотациям, паузам и
+    пересечениям; пересечения и границы вне файла останавливают
+    конвертацию до записи (ValueError со всеми такими уровнями).
+    """
+    if is_path(eaf_path) and not Path(eaf_path).is_file():
         raise FileNotFoundError(f"EAF-файл не найден: {eaf_path}")
+    if mode not in TEXTGRID_MODES:
+        raise ValueError(f"Неизвестный режим: {mode}")
+    from .diagnostics import Diagnostics, check_intervals
 
-    elan = pympi.Elan.Eaf(str(eaf_path))
-    ts_map = build_ts_map(elan)
-    max_time = max(ts_map.values(), default=0.0)
+    report = diagnostics if diagnostics is not None else Diagnostics()
+    reader = EafReader(eaf_path, tiers)
+    if workers is not None and workers > 1:
+        _eaf_to_textgrid_parallel(reader, tg_path, mode, workers, metrics, report)
+        return
 
-    tg = textgrid.Textgrid(minTimestamp=0.0, maxTimestamp=max_time)
+    raw_tiers = reader.iter_raw_tiers()
+    converted: List[TierIntervals] = []
+    while True:
+        with stage(metrics, "parse"):
+            item = next(raw_tiers, None)
+        if item is None:
+            break
+        name, rows = item
+        with stage(metrics, "normalize"):
+            intervals = reader.intervals(rows, report, name)
+            check_intervals(name, intervals, 0.0, reader.max_time, report)
+        converted.append((name, intervals))
 
-    for tier_name in elan.get_tier_names():
-        raw_ann = elan.get_annotation_data_for_tier(tier_name)
-        intervals = to_intervals(iter_annotations(raw_ann), ts_map)
+    report.raise_for_errors()
+    with stage(metrics, "serialize"):
+        write_textgrid(tg_path, converted, reader.max_time, mode)
 
-        tg.addTier(textgrid.IntervalTier(
-            name=tier_name,
-            entries=intervals,
-            minT=0.0,
-            maxT=max_time,
-        ))
+    if metrics is not None:
+        metrics.add(tiers=len(converted),
+                    annotations=sum(len(intervals) for _, intervals in converted))
 
+
+# Карта тайм-слотов в процессе-воркере: передаётся один раз при запуске
+# пула, а не с каждым уровнем.
+_worker_ts_map: TimeSlotMap = {}
+
+
+def _init_worker(ts_map: TimeSlotMap) -> None:
+    global _worker_ts_map
+    _worker_ts_map = ts_map
+
+
+def _render_tier(mode: str, tier_num: int, name: str,
+                 rows: List[RawAnnotation] | List[Interval], normalized: bool,
+                 max_time: float) -> Tuple[str | bytes | None, int, Diagnostics]:
+    """
+    (Воркер) нормализовать уровень, если нужно, проверить и отрисовать
+    его целиком; уровень с ошибками не отрисовывается.
+    """
+    from .diagnostics import Diagnostics, check_intervals
+
+    report = Diagnostics()
+    intervals = rows if normalized else to_intervals(rows, _worker_ts_map, report, name)
+    check_intervals(name, intervals, 0.0, max_time, report)
+    if report.errors:
+        return None, len(intervals), report
+    chunks = tier_chunks(mode, tier_num, name, intervals, 0.0, max_time)
+    return (b"" if mode == "binary" else "").join(chunks), len(intervals), report
+
+
+def _eaf_to_textgrid_parallel(reader: EafReader, tg_path: Dest, mode: str,
+                              workers: int, metrics: Optional[Metrics],
+                              report: Diagnostics) -> None:
+    """
+    XML читается в этом процессе (iterparse не делится), а каждый
+    уровень сразу по мере разбора уходит в пул: воркер переводит тайм-слоты
+    в секунды (to_intervals), дополняет паузами и отрисовывает уровень.
+    Зависимые уровни нормализуются здесь — им нужен индекс ссылок всего
+    файла. Куски пишутся в порядке уровней, поэтому номера уровней
+    и файл совпадают с последовательным режимом.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    pool = None
+    futures = []
+    max_time = 0.0
+    raw_tiers = reader.iter_raw_tiers()
     try:
-        tg.save(str(tg_path), format="short_textgrid",
-                includeEmptyIntervals=True)
-    except TypeError:
-        tg.save(str(tg_path), format="short_textgrid",
-                includeBlankSpaces=True)
+        while True:
+            with stage(metrics, "parse"):
+                item = next(raw_tiers, None)
+            if item is None:
+                break
+            if pool is None:
+                # TIME_ORDER стоит в EAF до уровней: к первому уровню карта готова
+                max_time = reader.max_time
+                pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                           initargs=(reader.ts_map,))
+            name, rows = item
+            normalized = isinstance(rows, RefRows)
+            if normalized:
+                with stage(metrics, "normalize"):
+                    rows = reader.intervals(rows, report, name)
+            futures.append(pool.submit(_render_tier, mode, len(futures) + 1, name,
+                                       rows, normalized, max_time))
 
-    print(f"Ваш файл тут - {tg_path}")
+        if pool is None:
+            max_time = reader.max_time
+        with stage(metrics, "serialize"):
+            # отчёты всех уровней нужны до записи: ошибка не оставит полфайла
+            results = [future.result() for future in futures]
+            for _, _, tier_report in results:
+                report.merge(tier_report)
+            report.raise_for_errors()
+            with (binary_writer if mode == "binary" else text_writer)(tg_path) as fh:
+                fh.write(_file_header(mode, len(results), 0.0, max_time))
+                for chunk, _, _ in results:
+                    fh.write(chunk)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    if metrics is not None:
+        metrics.add(tiers=len(results), annotations=sum(count for _, count, _ in results))
 
 
 def cli() -> None:
+    import argparse
+
+    from .diagnostics import Diagnostics
+
     p = argparse.ArgumentParser(description="Convert .eaf to .TextGrid")
     p.add_argument("input", help=".eaf file")
     p.add_argument("output", help=".TextGrid destination")
+    p.add_argument("--mode", choices=TEXTGRID_MODES, default="short",
+                   help="TextGrid format")
     args = p.parse_args()
 
-    eaf_to_textgrid(Path(args.input).expanduser(),
-                    Path(args.output).expanduser())
+    tg_path = Path(args.output).expanduser()
+    report = Diagnostics()
+    try:
+        eaf_to_textgrid(Path(args.input).expanduser(), tg_path, args.mode,
+                        diagnostics=report)
+    finally:
+        for line in report.lines("error", "warning"):
+            print(f"[WARN]  {line}", file=sys.stderr)
+
+    print(f"Ваш файл тут - {tg_path}")
@@ -2,21 +2,37 @@
 Обёртка над eaf_to_textgrid_core.eaf_to_textgrid
 """
 
-from pathlib import Path
-from typing import Literal
+from __future__ import annotations
 
-from praatio import textgrid
-import pympi
+import io
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Literal, Optional
 
 from . import eaf_to_textgrid_core as core
 from . import ConversionError
+from .fileio import base_suffix
+from .metrics import Metrics, track
+
+if TYPE_CHECKING:
+    from .diagnostics import Diagnostics
+    from .tierfilter import TierFilter
 
-Mode = Literal["short", "long"]
+Mode = Literal["short", "long", "binary"]
 
 
-def convert(input_eaf: str | Path, output_tg: str | Path, mode: Mode = "short") -> None:
+def convert(input_eaf: str | Path, output_tg: str | Path, mode: Mode = "short",
+            *, tiers: Optional[TierFilter] = None,
+            metrics: Optional[Metrics] = None,
+            workers: Optional[int] = None,
+            diagnostics: Optional[Diagnostics] = None) -> None:
     """
-    Конвертирует .eaf → .TextGrid (short или long).
+    Конвертирует .eaf → .TextGrid (short, long или бинарный binary).
+    tiers (converters.tierfilter.TierFilter) оставляет только выбранные уровни.
+    metrics (converters.metrics.Metrics) получает время по стадиям,
+    объём входа/выхода и число уровней/аннотаций.
+    workers > 1 раздаёт уровни файла по стольким процессам.
+    diagnostics (converters.diagnostics.Diagnostics) получает сводку
+    по пропущенным аннотациям, паузам и пересечениям интервалов.
     """
     path_in, path_out = Path(input_eaf), Path(output_tg)
 
@@ -25,18 +41,43 @@ def convert(input_eaf: str | Path, output_tg: str | Path, mode: Mode = "short")
         return
 
     # Проверяем расширение
-    if path_in.suffix.lower() not in {".eaf", ".xml"}:
+    if base_suffix(path_in) not in {".eaf", ".xml"}:
         print("Это не тот файл")
         return
 
+    convert_stream(path_in, path_out, mode, tiers=tiers, metrics=metrics, workers=workers,
+                   diagnostics=diagnostics)
+
+
+def convert_stream(src: BinaryIO | Path, dst: BinaryIO | Path, mode: Mode = "short",
+                   *, tiers: Optional[TierFilter] = None,
+                   metrics: Optional[Metrics] = None,
+                   workers: Optional[int] = None,
+                   diagnostics: Optional[Diagnostics] = None) -> None:
+    """
+    Конвертирует .eaf → .TextGrid между бинарными потоками (или путями),
+    без временных файлов.
+    """
     try:
-        if mode not in ("short", "long"):
+        if mode not in core.TEXTGRID_MODES:
             raise ValueError(f"Неизвестный режим: {mode}")
 
-        core.eaf_to_textgrid(path_in, path_out)
-
-        if mode == "long":
-            tg = textgrid.openTextgrid(str(path_out), includeEmptyIntervals=True)
-            tg.save(str(path_out), format="long_textgrid", includeBlankSpaces=True)
-    except (textgrid.TGReadWriteError, ValueError, Exception) as exc:
+        with track(metrics, "eaf2tg", src, dst, mode=mode):
+            core.eaf_to_textgrid(src, dst, mode, tiers=tiers, metrics=metrics,
+                                 workers=workers, diagnostics=diagnostics)
+    except Exception as exc:
         raise ConversionError(f"EAF → TextGrid: {exc}") from exc
+
+
+def convert_bytes(data: bytes, mode: Mode = "short",
+                  *, tiers: Optional[TierFilter] = None,
+                  metrics: Optional[Metrics] = None,
+                  workers: Optional[int] = None,
+                  diagnostics: Optional[Diagnostics] = None) -> bytes:
+    """
+    Конвертирует содержимое .eaf в содержимое .TextGrid целиком в памяти.
+    """
+    out = io.BytesIO()
+    convert_stream(io.BytesIO(data), out, mode, tiers=tiers, metrics=metrics,
+                   workers=workers, diagnostics=diagnostics)
+    return out.getvalue()
@@ -0,0 +1,148 @@
+"""
+Общий ввод-вывод для ядер: всё, что читает или пишет файлы, принимает
+либо путь, либо уже открытый бинарный поток (например, io.BytesIO).
+
+Сжатие gzip/bz2/xz прозрачно: вход распознаётся по сигнатуре (и путь,
+и поток), выход сжимается, если путь оканчивается на .gz/.bz2/.xz.
+Данные распаковываются и сжимаются на лету, без временных файлов.
+Модули сжатия импортируются только для сжатых файлов.
+"""
+
+from __future__ import annotations
+
+import codecs
+import importlib
+import io
+from contextlib import ExitStack, contextmanager
+from pathlib import Path, PurePath
+from typing import BinaryIO, Iterator, Optional, TextIO, Tuple, Union
+
+Source = Union[str, Path, BinaryIO]
+Dest = Union[str, Path, BinaryIO]
+
+BUFFER_SIZE = 1 << 16
+
+# сигнатура -> модуль стандартной библиотеки с функцией open()
+COMPRESSION_MAGIC = ((b"\x1f\x8b", "gzip"), (b"BZh", "bz2"), (b"\xfd7zXZ\x00", "lzma"))
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma"}
+# gzip.open по умолчанию сжимает с уровнем 9: в разы медленнее при почти том же размере
+_WRITE_OPTIONS = {"gzip": {"compresslevel": 6}}
+
+
+def is_path(obj: object) -> bool:
+    return isinstance(obj, (str, Path))
+
+
+def compression_of(head: bytes) -> Optional[str]:
+    """Модуль сжатия по первым байтам файла или None."""
+    for magic, module in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return module
+    return None
+
+
+def split_compression(path: Union[str, PurePath]) -> Tuple[PurePath, str]:
+    """«a/b.eaf.gz» → (a/b.eaf, ".gz"); без сжатия — (путь, "")."""
+    if not isinstance(path, PurePath):
+        path = PurePath(path)
+    if path.suffix.lower() in COMPRESSION_SUFFIXES:
+        return path.with_suffix(""), path.suffix
+    return path, ""
+
+
+def base_suffix(path: Union[str, PurePath]) -> str:
+    """Расширение формата в нижнем регистре без суффикса сжатия: «.eaf» у «x.EAF.gz»."""
+    return split_compression(path)[0].suffix.lower()
+
+
+def with_base_suffix(path: PurePath, suffix: str) -> PurePath:
+    """Сменить расширение формата, сохранив сжатие: «x.eaf.gz» → «x.TextGrid.gz»."""
+    base, compression = split_compression(path)
+    return path.with_name(base.with_suffix(suffix).name + compression)
+
+
+@contextmanager
+def binary_reader(source: Source) -> Iterator[BinaryIO]:
+    """
+    Буферизованный бинарный вход с peek() — чтобы заглянуть в заголовок,
+    не теряя его; сжатый вход отдаётся уже распакованным.
+    Открытое сами закрываем, чужой поток оставляем открытым.
+    """
+    with ExitStack() as stack:
+        if is_path(source):
+            raw = stack.enter_context(open(source, 'rb', buffering=BUFFER_SIZE))
+        elif hasattr(source, 'peek'):
+            raw = source
+        else:
+            raw = io.BufferedReader(source, BUFFER_SIZE)
+            stack.callback(raw.detach)
+
+        module = compression_of(raw.peek(8)[:8])
+        if module is not None:
+            # файловый объект, переданный в *.open, при закрытии не закрывается
+            raw = stack.enter_context(importlib.import_module(module).open(raw, 'rb'))
+        yield raw
+
+
+@contextmanager
+def text_reader(source: Source) -> Iterator[TextIO]:
+    """
+    Вход как текст; кодировка определяется по BOM
+    (Praat пишет UTF-16, если в файле есть не-ASCII).
+    """
+    with binary_reader(source) as raw:
+        head = raw.peek(3)[:3]
+        if head[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+            encoding = 'utf-16'
+        else:
+            encoding = 'utf-8-sig'
+        fh = io.TextIOWrapper(raw, encoding=encoding)
+        try:
+            yield fh
+        finally:
+            fh.detach()
+
+
+@contextmanager
+def _compressed_writer(dest: Union[str, Path]) -> Iterator[Optional[BinaryIO]]:
+    """Сжимающий бинарный поток для пути с .gz/.bz2/.xz, иначе None."""
+    module = COMPRESSION_SUFFIXES.get(PurePath(dest).suffix.lower())
+    if module is None:
+        yield None
+        return
+    with importlib.import_module(module).open(dest, 'wb', **_WRITE_OPTIONS.get(module, {})) as fh:
+        yield fh
+
+
+@contextmanager
+def text_writer(dest: Dest) -> Iterator[TextIO]:
+    """Буферизованный UTF-8 вывод в путь (сжатый по суффиксу) или в чужой бинарный поток."""
+    if is_path(dest):
+        with _compressed_writer(dest) as packed:
+            if packed is not None:
+                with text_writer(packed) as fh:
+                    yield fh
+                return
+        with open(dest, 'w', encoding='utf-8', newline='\n', buffering=BUFFER_SIZE) as fh:
+            yield fh
+    else:
+        fh = io.TextIOWrapper(dest, encoding='utf-8', newline='\n')
+        try:
+            yield fh
+        finally:
+            fh.flush()
+            fh.detach()
+
+
+@contextmanager
+def binary_writer(dest: Dest) -> Iterator[BinaryIO]:
+    """Буферизованный бинарный вывод в путь (сжатый по суффиксу) или в чужой бинарный поток."""
+    if is_path(dest):
+        with _compressed_writer(dest) as packed:
+            if packed is not None:
+                yield packed
+                return
+        with open(dest, 'wb', buffering=BUFFER_SIZE) as fh:
+            yield fh
+    else:
+        yield dest
@@ -0,0 +1,163 @@
+"""
+Инструментирование конвертации: время по стадиям, байты на входе/выходе,
+число уровней и аннотаций, пиковая память.
+
+    m = Metrics(sink=JsonLinesCollector("metrics.jsonl"))
+    convert(src, dst, mode="long", metrics=m)
+    m.records[-1]["stages"]  # {"parse": 0.41, "normalize": 0.08, "serialize": 0.12}
+
+Стадии, которые размечают ядра:
+  * EAF → TextGrid: parse (XML + TIME_ORDER), normalize (to_intervals), serialize;
+  * TextGrid → EAF: parse, time_slots, serialize.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+from .fileio import is_path
+
+Record = Dict[str, Any]
+
+
+class Metrics:
+    """
+    Контекст измерений одной или нескольких конвертаций.
+
+    Args:
+        sink: Вызывается с готовой записью (dict) после каждой конвертации.
+        trace_memory: Мерить пик через tracemalloc (точно, но в разы медленнее);
+            иначе в запись попадает максимальный RSS процесса.
+    """
+
+    def __init__(self, sink: Optional[Callable[[Record], None]] = None,
+                 trace_memory: bool = False) -> None:
+        self.sink = sink
+        self.trace_memory = trace_memory
+        self.records: List[Record] = []
+        self._current: Record = {}
+        self._started = 0.0
+        self._own_trace = False
+
+    def start(self, **info: Any) -> None:
+        self._current = {"ts": time.time(), **info, "stages": {},
+                         "tiers": 0, "annotations": 0}
+        if self.trace_memory:
+            import tracemalloc
+            self._own_trace = not tracemalloc.is_tracing()
+            if self._own_trace:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Время стадии; повторные входы в одну стадию суммируются."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stages = self._current.setdefault("stages", {})
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
+
+    def add(self, **counters: int) -> None:
+        for name, value in counters.items():
+            self._current[name] = self._current.get(name, 0) + value
+
+    def finish(self, error: Optional[str] = None) -> Record:
+        record = self._current
+        record["seconds"] = time.perf_counter() - self._started
+        if self.trace_memory:
+            import tracemalloc
+            record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            if self._own_trace:
+                tracemalloc.stop()
+        else:
+            record["max_rss_bytes"] = _max_rss()
+        record["error"] = error
+
+        self.records.append(record)
+        self._current = {}
+        if self.sink is not None:
+            self.sink(record)
+        return record
+
+
+class JsonLinesCollector:
+    """Приёмник записей: одна JSON-строка на конвертацию, файл дописывается."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def __call__(self, record: Record) -> None:
+        import json
+
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+
+def stage(metrics: Optional[Metrics], name: str) -> ContextManager[None]:
+    """metrics.stage(name) или пустой контекст, если измерения выключены."""
+    return metrics.stage(name) if metrics is not None else nullcontext()
+
+
+def _max_rss() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    import sys
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _position(obj: Any) -> Optional[int]:
+    if is_path(obj):
+        return None
+    try:
+        return obj.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _size(obj: Any, before: Optional[int]) -> Optional[int]:
+    if is_path(obj):
+        try:
+            return Path(obj).stat().st_size
+        except OSError:
+            return None
+    after = _position(obj)
+    return after - before if after is not None and before is not None else None
+
+
+@contextmanager
+def track(metrics: Optional[Metrics], direction: str, src: Any, dst: Any,
+          **info: Any) -> Iterator[None]:
+    """
+    Обрамляет одну конвертацию: start(), байты входа/выхода, finish().
+    При metrics=None ничего не делает.
+    """
+    if metrics is None:
+        yield
+        return
+
+    name = str(src) if is_path(src) else getattr(src, "name", None)
+    metrics.start(direction=direction, input=name, **info)
+    read_pos, write_pos = _position(src), _position(dst)
+    error = None
+    try:
+        yield
+    except BaseException as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        metrics.add(bytes_read=_size(src, read_pos) or 0,
+                    bytes_written=_size(dst, write_pos) or 0)
+        metrics.finish(error=error)
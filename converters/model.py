@@ -0,0 +1,230 @@
+"""
+Общая модель аннотаций для обоих направлений и всех писателей.
+
+TextGrid (колоночные интервальные уровни и точечные уровни) — опорное
+представление: его отдают читатели TextGrid (short/long/binary, tgindex)
+и eaf_to_textgrid_core.read_eaf, из него пишутся EAF (write_eaf_stream)
+и TextGrid любого формата. Поэтому short ↔ long и нормализация EAF
+(converters.reformat) идут напрямую, без второго формата посередине.
+
+Здесь же — текстовая разметка Praat, общая для писателя TextGrid
+из EAF и для переформатирования TextGrid.
+"""
+
+from __future__ import annotations
+
+import typing as tp
+from array import array
+from dataclasses import dataclass
+
+from .fileio import Dest
+
+Interval = tp.Tuple[float, float, str]  # начало, конец (секунды), текст
+TierIntervals = tp.Tuple[str, tp.List[Interval]]  # имя уровня, интервалы
+
+
+def num_to_str(value: float) -> str:
+    """Число в том виде, в каком его пишет Praat: «4», а не «4.0»."""
+    return "%d" % value if value.is_integer() else repr(value)
+
+
+def quote(text: str) -> str:
+    """Строка TextGrid: в кавычках, внутренние кавычки удваиваются."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+@dataclass
+class TextGrid:
+    """
+    Представляет TextGrid-файл (формат Praat) с несколькими уровнями (tiers),
+    содержащими интервалы или метки во времени.
+    """
+
+    class Tier:
+        """
+        Базовый класс для уровня в TextGrid, хранит имя, диапазон и элементы.
+        """
+        __slots__ = ('name', 'start', 'end', 'size')
+
+        def __init__(self, name: str, start: str = '1e9', end: str = '0.0', size: int = 0) -> None:
+            self.name = name
+            self.start = start
+            self.end = end
+            self.size = size
+
+    class IntervalTier(Tier):
+        """
+        Интервальный уровень в колоночном виде: начала и концы лежат
+        в array('d') (секунды), метки — в отдельном списке.
+        """
+        __slots__ = ('starts', 'ends', 'labels')
+
+        @dataclass
+        class Interval:
+            """
+            Представляет помеченный временной интервал.
+            """
+            label: str
+            start: float
+            end: float
+
+        class View(tp.Sequence['TextGrid.IntervalTier.Interval']):
+            """
+            Совместимое представление tier.items: Interval создаются
+            только при обращении.
+            """
+            __slots__ = ('_tier',)
+
+            def __init__(self, tier: 'TextGrid.IntervalTier') -> None:
+                self._tier = tier
+
+            def __len__(self) -> int:
+                return len(self._tier.labels)
+
+            def __getitem__(self, idx):
+                tier = self._tier
+                if isinstance(idx, slice):
+                    return [self[i] for i in range(*idx.indices(len(self)))]
+                return TextGrid.IntervalTier.Interval(
+                    tier.labels[idx], tier.starts[idx], tier.ends[idx])
+
+            def __iter__(self) -> tp.Iterator['TextGrid.IntervalTier.Interval']:
+                interval = TextGrid.IntervalTier.Interval
+                tier = self._tier
+                for label, start, end in zip(tier.labels, tier.starts, tier.ends):
+                    yield interval(label, start, end)
+
+        def __init__(self, name: str, start: str = '1e9', end: str = '0.0', size: int = 0) -> None:
+            super().__init__(name, start, end, size)
+            self.starts = array('d')
+            self.ends = array('d')
+            self.labels: list[str] = []
+
+        @property
+        def items(self) -> 'TextGrid.IntervalTier.View':
+            return TextGrid.IntervalTier.View(self)
+
+        def append(self, start: float, end: float, label: str) -> None:
+            """
+            Добавляет интервал без создания промежуточных объектов.
+            """
+            self.starts.append(start)
+            self.ends.append(end)
+            self.labels.append(label)
+
+        @classmethod
+        def from_intervals(cls, name: str, intervals: tp.Sequence[Interval],
+                           start: str = '1e9', end: str = '0.0') -> 'TextGrid.IntervalTier':
+            """Уровень из списка (начало, конец, текст) в секундах."""
+            tier = cls(name, start, end, len(intervals))
+            tier.starts = array('d', [interval[0] for interval in intervals])
+            tier.ends = array('d', [interval[1] for interval in intervals])
+            tier.labels = [interval[2] for interval in intervals]
+            return tier
+
+        def extend(self, item: 'TextGrid.IntervalTier.Interval') -> None:
+            """
+            Добавляет интервал (совместимость со старым API).
+            """
+            self.append(float(item.start), float(item.end), item.label)
+
+    class TextTier(Tier):
+        __slots__ = ('items',)
+
+        @dataclass
+        class Point:
+            """
+            Представляет помеченную временную точку.
+            """
+            time: str
+            label: str
+
+        def __init__(self, name: str, start: str = '1e9', end: str = '0.0', size: int = 0) -> None:
+            super().__init__(name, start, end, size)
+            self.items: list[TextGrid.TextTier.Point] = []
+
+        def extend(self, item: 'TextGrid.TextTier.Point') -> None:
+            """
+            Добавляет точку в уровень.
+            """
+            self.items.append(item)
+
+    def __init__(self, xmin: str = '1e9', xmax: str = '0.0') -> None:
+        self.xmin: str = xmin
+        self.xmax: str = xmax
+        self.tiers: list[TextGrid.Tier] = []
+
+    @staticmethod
+    def write(filepath: Dest, textgrid: 'TextGrid', mode: str = "short") -> None:
+        """
+        Записывает объект TextGrid в файл: short/long — текст Praat,
+        binary — ooBinaryFile (см. textgrid_to_eaf_core.dump_textgrid).
+        """
+        from .textgrid_to_eaf_core import dump_textgrid
+        dump_textgrid(filepath, textgrid, mode)
+
+    @staticmethod
+    def write_binary(filepath: Dest, textgrid: 'TextGrid') -> None:
+        """
+        Записывает объект TextGrid в бинарном формате Praat (ooBinaryFile).
+        """
+        TextGrid.write(filepath, textgrid, "binary")
+
+
+# Текстовый TextGrid: short — одно значение на строке, long — «ключ = значение »
+# с отступами в четыре пробела (как у Praat и praatio).
+TEXT_HEAD = 'File type = "ooTextFile"\nObject class = "TextGrid"\n\n'
+_TAB = " " * 4
+
+
+def text_header(mode: str, xmin: str, xmax: str, size: int, exists: bool = True) -> str:
+    """Заголовок файла; exists=False — «<absent>», файл без уровней."""
+    if mode == "short":
+        if not exists:
+            return TEXT_HEAD + f"{xmin}\n{xmax}\n<absent>\n"
+        return TEXT_HEAD + f"{xmin}\n{xmax}\n<exists>\n{size}\n"
+    if not exists:
+        return TEXT_HEAD + f"xmin = {xmin} \nxmax = {xmax} \ntiers? <absent> \n"
+    return TEXT_HEAD + (f"xmin = {xmin} \nxmax = {xmax} \ntiers? <exists> \n"
+                        f"size = {size} \nitem []: \n")
+
+
+def _long_tier_head(tier_class: str, tier_num: int, name: str, xmin: str, xmax: str,
+                    items: str, size: int) -> str:
+    return (f"{_TAB}item [{tier_num}]:\n"
+            f'{_TAB * 2}class = "{tier_class}" \n'
+            f"{_TAB * 2}name = {quote(name)} \n"
+            f"{_TAB * 2}xmin = {xmin} \n"
+            f"{_TAB * 2}xmax = {xmax} \n"
+            f"{_TAB * 2}{items}: size = {size} \n")
+
+
+def interval_tier_text(mode: str, tier_num: int, name: str, xmin: str, xmax: str,
+                       size: int, entries: tp.Iterable[Interval]) -> tp.Iterator[str]:
+    """Интервальный уровень; tier_num (с 1) нужен только long."""
+    if mode == "short":
+        yield f'"IntervalTier"\n{quote(name)}\n{xmin}\n{xmax}\n{size}\n'
+        for start, end, text in entries:
+            yield f"{num_to_str(start)}\n{num_to_str(end)}\n{quote(text)}\n"
+        return
+    yield _long_tier_head("IntervalTier", tier_num, name, xmin, xmax, "intervals", size)
+    for num, (start, end, text) in enumerate(entries, start=1):
+        yield (f"{_TAB * 2}intervals [{num}]:\n"
+               f"{_TAB * 3}xmin = {num_to_str(start)} \n"
+               f"{_TAB * 3}xmax = {num_to_str(end)} \n"
+               f"{_TAB * 3}text = {quote(text)} \n")
+
+
+def point_tier_text(mode: str, tier_num: int, name: str, xmin: str, xmax: str,
+                    size: int, points: tp.Iterable[tp.Tuple[str, str]]) -> tp.Iterator[str]:
+    """Точечный уровень из пар (время как в файле, метка)."""
+    if mode == "short":
+        yield f'"TextTier"\n{quote(name)}\n{xmin}\n{xmax}\n{size}\n'
+        for time, label in points:
+            yield f"{time}\n{quote(label)}\n"
+        return
+    yield _long_tier_head("TextTier", tier_num, name, xmin, xmax, "points", size)
+    for num, (time, label) in enumerate(points, start=1):
+        yield (f"{_TAB * 2}points [{num}]:\n"
+               f"{_TAB * 3}number = {time} \n"
+               f"{_TAB * 3}mark = {quote(label)} \n")
@@ -0,0 +1,93 @@
+"""
+Прямые конвертации внутри одного формата через общую модель
+(converters.model) — без второго формата посередине и без praatio/pympi:
+
+    reformat_textgrid("in.TextGrid", "out.TextGrid", mode="long")   # short/long/binary
+    normalize_eaf("in.eaf", "out.eaf")
+
+Нормализованный EAF: тайм-слоты пронумерованы по времени (ts1, ts2, ...),
+неиспользуемые и без TIME_VALUE отброшены, ID аннотаций идут подряд,
+зависимые уровни получают время родителя и становятся выравниваемыми.
+В отличие от EAF → TextGrid → EAF, паузы не превращаются в пустые аннотации.
+"""
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from . import ConversionError
+from . import eaf_to_textgrid_core as eaf_core
+from . import textgrid_to_eaf_core as tg_core
+from .diagnostics import Diagnostics
+from .metrics import Metrics, stage, track
+from .model import TextGrid
+from .tierfilter import TierFilter
+
+
+def _count(metrics: Optional[Metrics], tg: TextGrid) -> None:
+    if metrics is not None:
+        metrics.add(tiers=len(tg.tiers),
+                    annotations=sum(len(tier.labels) if isinstance(tier, TextGrid.IntervalTier)
+                                    else len(tier.items) for tier in tg.tiers))
+
+
+def reformat_textgrid(src: BinaryIO | str | Path, dst: BinaryIO | str | Path,
+                      *, mode: str = "short", tiers: Optional[TierFilter] = None,
+                      metrics: Optional[Metrics] = None) -> None:
+    """
+    TextGrid любого формата → TextGrid в формате mode (short/long/binary).
+    Числа границ и времена точек переносятся как есть.
+    """
+    try:
+        if mode not in tg_core.TEXTGRID_MODES:
+            raise ValueError(f"Неизвестный режим: {mode}")
+        with track(metrics, "tg2tg", src, dst, mode=mode):
+            with stage(metrics, "parse"):
+                tg = tg_core.parse_textgrid(src, tiers=tiers)
+            with stage(metrics, "serialize"):
+                tg_core.dump_textgrid(dst, tg, mode)
+            _count(metrics, tg)
+    except Exception as exc:  # в т.ч. битый gzip/bz2/xz: OSError, EOFError, LZMAError
+        raise ConversionError(f"TextGrid → TextGrid: {exc}") from exc
+
+
+def normalize_eaf(src: BinaryIO | str | Path, dst: BinaryIO | str | Path,
+                  *, tolerance_ms: int = 0, tiers: Optional[TierFilter] = None,
+                  metrics: Optional[Metrics] = None,
+                  diagnostics: Optional[Diagnostics] = None) -> None:
+    """
+    EAF → нормализованный EAF (см. описание модуля). Границы ближе
+    tolerance_ms мс сливаются в один тайм-слот; пропущенные аннотации
+    без времени попадают в diagnostics.
+    """
+    try:
+        with track(metrics, "eaf2eaf", src, dst):
+            with stage(metrics, "parse"):
+                tg = eaf_core.read_eaf(src, tiers, diagnostics)
+            with stage(metrics, "time_slots"):
+                time_slots, rows = tg_core.stream_textgrid_to_eaf(tg, tolerance_ms=tolerance_ms)
+            with stage(metrics, "serialize"):
+                tg_core.write_eaf_stream(dst, time_slots, rows)
+            _count(metrics, tg)
+    except Exception as exc:
+        raise ConversionError(f"EAF → EAF: {exc}") from exc
+
+
+def reformat_textgrid_bytes(data: bytes, *, mode: str = "short",
+                            tiers: Optional[TierFilter] = None,
+                            metrics: Optional[Metrics] = None) -> bytes:
+    out = io.BytesIO()
+    reformat_textgrid(io.BytesIO(data), out, mode=mode, tiers=tiers, metrics=metrics)
+    return out.getvalue()
+
+
+def normalize_eaf_bytes(data: bytes, *, tolerance_ms: int = 0,
+                        tiers: Optional[TierFilter] = None,
+                        metrics: Optional[Metrics] = None,
+                        diagnostics: Optional[Diagnostics] = None) -> bytes:
+    out = io.BytesIO()
+    normalize_eaf(io.BytesIO(data), out, tolerance_ms=tolerance_ms, tiers=tiers,
+                  metrics=metrics, diagnostics=diagnostics)
+    return out.getvalue()
@@ -0,0 +1,251 @@
+"""
+Локальный HTTP-сервис конвертации на asyncio (только стандартная библиотека).
+
+    python -m converters serve --port 8765 -j 8
+
+    curl --data-binary @file.eaf "http://127.0.0.1:8765/eaf2tg?mode=long" -o file.TextGrid
+    curl --data-binary @file.TextGrid "http://127.0.0.1:8765/tg2eaf?include=words" -o file.eaf
+    curl --data-binary @short.TextGrid "http://127.0.0.1:8765/tg2tg?mode=long" -o long.TextGrid
+    curl http://127.0.0.1:8765/health
+
+Конвертация идёт в пуле заранее запущенных процессов, в которых ядра
+уже импортированы. Одновременно принимается не больше max_pending
+запросов: сверх этого сервер сразу отвечает 503 с Retry-After, а тело
+больше max_body отклоняется с 413 по заголовку Content-Length, не
+дочитываясь (клиенты с «Expect: 100-continue» даже не начнут его слать).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from . import ConversionError, __version__
+from .cache import MB, ConversionCache, convert_bytes
+from .tierfilter import TierFilter
+
+CONTENT_TYPES = {
+    "eaf2tg": "text/plain; charset=utf-8",
+    "tg2eaf": "application/xml; charset=utf-8",
+    "tg2tg": "text/plain; charset=utf-8",
+    "eaf2eaf": "application/xml; charset=utf-8",
+}
+TEXTGRID_OUTPUT = ("eaf2tg", "tg2tg")
+TEXTGRID_MODES = ("short", "long", "binary")
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    408: "Request Timeout", 411: "Length Required", 413: "Payload Too Large",
+    422: "Unprocessable Entity", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, close: bool = False) -> None:
+        super().__init__(message)
+        self.status = status
+        self.close = close
+
+
+def _warm_worker() -> None:
+    """Инициализатор воркера: ядра импортируются до первого запроса."""
+    from . import eaf_to_textgrid_wrap, textgrid_to_eaf_wrap  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class ConversionServer:
+    """
+    Args:
+        workers: Число процессов-воркеров (по умолчанию — число ядер).
+        max_pending: Сколько запросов может конвертироваться или ждать воркера.
+        max_body: Предельный размер тела запроса в байтах.
+        timeout: Сколько секунд ждать заголовки и тело запроса.
+        cache: Кэш результатов (None — без кэша).
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 max_body: int = 64 * MB, timeout: float = 30.0,
+                 cache: Optional[ConversionCache] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self.max_body = max_body
+        self.timeout = timeout
+        self.cache = cache
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        """Запустить и прогреть пул воркеров, затем начать принимать соединения."""
+        loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ping)
+                               for _ in range(self.workers)))
+        self._slots = asyncio.Semaphore(self.max_pending)
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader, writer)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    status, content_type, payload = await self._dispatch(method, target, body)
+                except HTTPError as exc:
+                    status, content_type = exc.status, "text/plain; charset=utf-8"
+                    payload = (str(exc) + "\n").encode()
+                    keep_alive = keep_alive and not exc.close
+
+                extra = "Retry-After: 1\r\n" if status == 503 else ""
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"{extra}"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # остановка сервиса: открытые keep-alive соединения просто закрываются
+        finally:
+            writer.close()
+
+    async def _read_request(
+            self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.timeout)
+        except asyncio.IncompleteReadError as exc:
+            if not exc.partial:
+                return None  # клиент закрыл соединение между запросами
+            raise HTTPError(400, "обрыв заголовков", close=True) from None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400, "слишком длинные заголовки", close=True) from None
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "заголовки не получены вовремя", close=True) from None
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "некорректная строка запроса", close=True) from None
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "нужен Content-Length", close=True)
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "некорректный Content-Length", close=True) from None
+        if length < 0:
+            raise HTTPError(400, "некорректный Content-Length", close=True)
+        if length > self.max_body:
+            raise HTTPError(413, f"тело больше {self.max_body} байт", close=True)
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "тело не получено вовремя", close=True) from None
+        return method, target, headers, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/")
+
+        if path == "/health":
+            status = {"status": "ok", "version": __version__, "workers": self.workers,
+                      "in_flight": self.in_flight, "max_pending": self.max_pending}
+            return 200, "application/json", json.dumps(status).encode()
+
+        direction = path.lstrip("/")
+        if direction not in CONTENT_TYPES:
+            raise HTTPError(404, f"неизвестный путь: {url.path}")
+        if method != "POST":
+            raise HTTPError(405, "нужен POST")
+
+        query = parse_qs(url.query)
+        mode = query.get("mode", [None])[-1]
+        if mode is not None and mode not in TEXTGRID_MODES:
+            raise HTTPError(400, f"неизвестный режим: {mode}")
+        if direction in TEXTGRID_OUTPUT:
+            mode = mode or "short"
+        tiers = TierFilter.build(query.get("include"), query.get("exclude"))
+
+        content_type = CONTENT_TYPES[direction]
+        if direction in TEXTGRID_OUTPUT and mode == "binary":
+            content_type = "application/octet-stream"
+        return 200, content_type, await self._convert(body, direction, mode, tiers)
+
+    async def _convert(self, data: bytes, direction: str, mode: Optional[str],
+                       tiers: Optional[TierFilter]) -> bytes:
+        key = None
+        if self.cache is not None:
+            # хэш большого тела и чтение с диска не должны держать цикл событий
+            key = await asyncio.to_thread(self.cache.key, data, direction, mode, tiers)
+            hit = await asyncio.to_thread(self.cache.get, key)
+            if hit is not None:
+                return hit
+
+        # backpressure: лишние запросы не копятся в очереди, а сразу получают 503
+        if self._slots.locked():
+            raise HTTPError(503, "сервер занят, повторите позже")
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.pool, convert_bytes, data, direction, mode, None, tiers)
+            except ConversionError as exc:
+                raise HTTPError(422, str(exc)) from None
+            except Exception as exc:
+                raise HTTPError(500, f"{type(exc).__name__}: {exc}") from None
+            finally:
+                self.in_flight -= 1
+
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, key, result)
+        return result
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, **options) -> None:
+    """Запустить сервис и работать до Ctrl+C или SIGTERM."""
+    server = ConversionServer(**options)
+    # SIGTERM завершает так же, как Ctrl+C: через finally, вместе с воркерами
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:  # Windows
+        pass
+    try:
+        listener = await server.start(host, port)
+        print(f"Сервис конвертации: http://{host}:{port} "
+              f"(воркеров: {server.workers}, очередь: {server.max_pending})", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
@@ -0,0 +1,193 @@
+"""
+Инкрементальная синхронизация корпуса: конвертируются только новые
+и изменённые файлы, выходы удалённых источников удаляются.
+
+Состояние хранится в манифесте (JSON) в каталоге выхода: для каждого
+выходного файла — путь источника, его размер, mtime и sha256, а в
+заголовке — версия пакета, направление, режим и фильтр уровней.
+Изменение заголовка означает полную пересборку. Файл, у которого совпали размер и mtime,
+считается неизменным без чтения; при несовпадении сравнивается хэш,
+так что «touch» без правок не вызывает конвертацию.
+
+    python -m converters sync eaf2tg corpus/ -o textgrids/ --mode long
+    python -m converters sync tg2eaf data/ -o eaf/ --watch --interval 30
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import __version__
+from .batch import Job, collect_jobs, run_batch
+from .tierfilter import TierFilter
+
+MANIFEST_NAME = ".converters-manifest.json"
+
+Entry = Dict[str, object]  # src, size, mtime_ns, sha256
+
+
+@dataclass
+class SyncResult:
+    """Итог одного прохода синхронизации."""
+    converted: List[Path] = field(default_factory=list)
+    unchanged: int = 0
+    removed: List[Path] = field(default_factory=list)
+    failed: List[Tuple[Path, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(path: Path, header: Dict[str, object]) -> Tuple[Dict[str, Entry], bool]:
+    """
+    (записи манифеста, совпал ли заголовок). Записи чужой сборки годятся
+    только для удаления устаревших выходов, но не для пропуска конвертации.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}, False
+    same_build = all(data.get(key) == value for key, value in header.items())
+    return data.get("files", {}), same_build
+
+
+def save_manifest(path: Path, header: Dict[str, object], files: Dict[str, Entry]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({**header, "files": files}, ensure_ascii=False, indent=1),
+                   encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _remove_output(path: Path, root: Path) -> None:
+    """Удалить выход и опустевшие каталоги над ним (но не сам root)."""
+    path.unlink(missing_ok=True)
+    parent = path.parent
+    while parent != root and root in parent.parents:
+        try:
+            parent.rmdir()
+        except OSError:  # не пуст
+            break
+        parent = parent.parent
+
+
+def sync(
+        inputs: Iterable[str],
+        output_dir: Path,
+        direction: str,
+        *,
+        mode: Optional[str] = None,
+        workers: Optional[int] = None,
+        manifest: Optional[Path] = None,
+        cache_dir: Optional[str] = None,
+        cache_size: int = 0,
+        tiers: Optional[TierFilter] = None,
+) -> SyncResult:
+    """
+    Привести output_dir в соответствие входам: сконвертировать новые и
+    изменённые файлы, удалить выходы пропавших источников, обновить манифест.
+    Ошибка тоже запоминается в манифесте: файл пробуется снова, только когда
+    изменится он сам или версия пакета, а до тех пор попадает в result.failed.
+    """
+    started = time.perf_counter()
+    output_dir = Path(output_dir)
+    manifest = Path(manifest) if manifest is not None else output_dir / MANIFEST_NAME
+    header = {"version": __version__, "direction": direction, "mode": mode,
+              "tiers": tiers.key() if tiers is not None else None}
+
+    old, same_build = load_manifest(manifest, header)
+    files: Dict[str, Entry] = {}
+    stale: Dict[str, Tuple[Job, Entry]] = {}
+    result = SyncResult()
+
+    def keep(key: str, job: Job, entry: Entry) -> None:
+        files[key] = entry
+        if "error" in entry:
+            result.failed.append((job.src, str(entry["error"])))
+        else:
+            result.unchanged += 1
+
+    for job in collect_jobs(inputs, output_dir, direction):
+        key = job.dst.relative_to(output_dir).as_posix()
+        st = job.src.stat()
+        entry: Entry = {"src": str(job.src), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        prev = old.get(key) if same_build else None
+
+        # файл с ошибкой не имеет выхода, но и повторять его без изменений незачем
+        if prev is not None and prev["src"] == entry["src"] \
+                and ("error" in prev or job.dst.exists()):
+            if prev["size"] == entry["size"] and prev["mtime_ns"] == entry["mtime_ns"]:
+                keep(key, job, prev)
+                continue
+            entry["sha256"] = file_digest(job.src)
+            if prev.get("sha256") == entry["sha256"]:
+                if "error" in prev:
+                    entry["error"] = prev["error"]
+                keep(key, job, entry)
+                continue
+        else:
+            entry["sha256"] = file_digest(job.src)
+        stale[key] = (job, entry)
+
+    for key in old.keys() - files.keys() - stale.keys():
+        dst = output_dir / key
+        _remove_output(dst, output_dir)
+        result.removed.append(dst)
+
+    if stale:
+        batch = run_batch([job for job, _ in stale.values()], direction,
+                          mode=mode or "short", workers=workers,
+                          cache_dir=cache_dir, cache_size=cache_size, tiers=tiers)
+        errors = {src: error for src, error in batch.failed}
+        for key, (job, entry) in stale.items():
+            files[key] = entry
+            if job.src in errors:
+                entry["error"] = errors[job.src]
+                result.failed.append((job.src, errors[job.src]))
+            else:
+                result.converted.append(job.dst)
+
+    if files != old or not same_build:
+        save_manifest(manifest, header, files)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def print_summary(result: SyncResult) -> None:
+    for src, error in result.failed:
+        print(f"[ERR] {src}: {error}", file=sys.stderr)
+    print(f"Синхронизация за {result.seconds:.1f} с: сконвертировано {len(result.converted)}, "
+          f"без изменений {result.unchanged}, удалено {len(result.removed)}, "
+          f"ошибок {len(result.failed)}", file=sys.stderr)
+
+
+def watch(inputs: List[str], output_dir: Path, direction: str, *,
+          interval: float = 10.0, **options) -> None:
+    """
+    Повторять sync() каждые interval секунд до Ctrl+C; сводка печатается,
+    только когда что-то сконвертировано, удалено или изменился список ошибок.
+    """
+    reported: Optional[set] = None
+    try:
+        while True:
+            result = sync(inputs, output_dir, direction, **options)
+            failed = set(result.failed)
+            if result.converted or result.removed or failed != reported:
+                print_summary(result)
+                reported = failed
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
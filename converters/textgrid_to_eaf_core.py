@@ -1,10 +1,17 @@
-import sys
+import collections
+import contextlib
+import itertools
+import struct
 import typing as tp
 import re
+from array import array
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
-from pathlib import Path
-from xml.etree import ElementTree as ET
+
+from .fileio import Dest, Source, binary_reader, binary_writer, is_path, text_reader, text_writer
+from .metrics import Metrics, stage
+from .model import TextGrid, interval_tier_text, num_to_str, point_tier_text, text_header
+from .tierfilter import TierFilter
 
 
 @dataclass
@@ -47,57 +54,102 @@ class EAF:
 
         annotations: dict[str, 'EAF.Tier.Annotation'] = field(default_factory=dict)
 
-    time_slots: dict[str, str | None] = field(default_factory=dict)
+    time_slots: dict[str, str | int | None] = field(default_factory=dict)
     tiers: dict[str, Tier] = field(default_factory=dict)
 
 
-def _eaf_to_etree_root(eaf: EAF) -> ET.Element:
+TimeSlotRow = tuple[str, tp.Union[str, int, None]]  # id слота, мс
+AnnotationRow = tuple[str, 'EAF.Tier.Annotation']  # id аннотации, аннотация
+TierRows = tuple[str, tp.Iterable[AnnotationRow]]  # id уровня, аннотации
+
+
+def _escape(text: str) -> str:
+    # xml.sax.saxutils.escape тянет за собой urllib/http/ssl — дорого на холодном старте
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _attr(value: str) -> str:
+    value = _escape(value).replace('"', "&quot;").replace("\n", "&#10;").replace("\t", "&#9;")
+    return '"' + value + '"'
+
+
+def _tier_xml(tier_id: str, annotations: tp.Iterable[AnnotationRow],
+              pretty: bool = True) -> tp.Iterator[str]:
+    """Элемент TIER со всеми аннотациями — по строке на ANNOTATION."""
+    nl, i1 = ("\n", "    ") if pretty else ("", "")
+    i2, i3, i4 = i1 * 2, i1 * 3, i1 * 4
+    yield f'{i1}<TIER TIER_ID={_attr(tier_id)} LINGUISTIC_TYPE_REF="default-lt">{nl}'
+    for ann_id, annot in annotations:
+        if isinstance(annot, EAF.Tier.AlignedAnnotation):
+            tag = 'ALIGNABLE_ANNOTATION'
+            attrs = (f'TIME_SLOT_REF1={_attr(annot.start_ref)} '
+                     f'TIME_SLOT_REF2={_attr(annot.end_ref)}')
+            if annot.svg_ref:
+                attrs += f' SVG_REF={_attr(annot.svg_ref)}'
+        else:
+            tag = 'REF_ANNOTATION'
+            attrs = f'ANNOTATION_REF={_attr(annot.ref_id)}'
+            if annot.prev_annot:
+                attrs += f' PREVIOUS_ANNOTATION={_attr(annot.prev_annot)}'
+        yield (f'{i2}<ANNOTATION>{nl}'
+               f'{i3}<{tag} ANNOTATION_ID={_attr(ann_id)} {attrs}>{nl}'
+               f'{i4}<ANNOTATION_VALUE>{_escape(annot.value)}</ANNOTATION_VALUE>{nl}'
+               f'{i3}</{tag}>{nl}'
+               f'{i2}</ANNOTATION>{nl}')
+    yield f'{i1}</TIER>{nl}'
+
+
+def write_eaf_stream(
+        dest: Dest,
+        time_slots: tp.Iterable[TimeSlotRow],
+        tiers: tp.Iterable[TierRows | str],
+        *,
+        pretty: bool = True,
+) -> None:
+    """
+    Потоково пишет EAF: HEADER, TIME_ORDER и каждый TIER/ANNOTATION
+    уходят в буферизованный файл по мере появления, без дерева ElementTree.
+
+    Args:
+        dest: Путь или бинарный поток для записи.
+        time_slots: Пары (TIME_SLOT_ID, мс) уже в порядке TIME_ORDER.
+        tiers: Итератор уровней (TIER_ID, итератор (ANNOTATION_ID, аннотация))
+            или уже готовых элементов TIER (строкой, см. _tier_xml).
+        pretty: Писать с переносами строк и отступами.
+    """
+    nl, i1 = ("\n", "    ") if pretty else ("", "")
+    i2 = i1 * 2
     date = datetime.now(timezone(timedelta(hours=3))).isoformat()
-    root = ET.Element('ANNOTATION_DOCUMENT', attrib={
-        'AUTHOR': '', 'DATE': date, 'VERSION': '1.0'
-    })
-
-    ET.SubElement(root, "LINGUISTIC_TYPE",
-                  attrib={"LINGUISTIC_TYPE_ID": "default-lt",
-                          "TIME_ALIGNABLE": "true"})
-
-    ET.SubElement(root, 'HEADER', attrib={'MEDIA_FILE': '',
-                                          'TIME_UNITS': 'milliseconds'})
-    time_order = ET.SubElement(root, 'TIME_ORDER')
-
-    for ts_id, ts_val in sorted(eaf.time_slots.items(),
-                                key=lambda kv: int(kv[1])):
-        ET.SubElement(time_order, 'TIME_SLOT',
-                      attrib={'TIME_SLOT_ID': ts_id, 'TIME_VALUE': ts_val or ""})
-
-    for tier_id, tier in eaf.tiers.items():
-        cur_tier = ET.SubElement(root, 'TIER', attrib={
-            'TIER_ID': tier_id,
-            'LINGUISTIC_TYPE_REF': 'default-lt'
-        })
-        for ann_id, annot in tier.annotations.items():
-            ann_el = ET.SubElement(cur_tier, 'ANNOTATION')
-            if isinstance(annot, EAF.Tier.AlignedAnnotation):
-                al_el = ET.SubElement(ann_el, 'ALIGNABLE_ANNOTATION', attrib={
-                    'ANNOTATION_ID': ann_id,
-                    'TIME_SLOT_REF1': annot.start_ref,
-                    'TIME_SLOT_REF2': annot.end_ref,
-                })
-                if annot.svg_ref:
-                    al_el.set('SVG_REF', annot.svg_ref)
-                ET.SubElement(al_el, 'ANNOTATION_VALUE').text = annot.value
+
+    with text_writer(dest) as fh:
+        write = fh.write
+        write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        write(f'<ANNOTATION_DOCUMENT AUTHOR="" DATE="{date}" VERSION="1.0">{nl}')
+        write(f'{i1}<HEADER MEDIA_FILE="" TIME_UNITS="milliseconds"/>{nl}')
+
+        write(f'{i1}<TIME_ORDER>{nl}')
+        for ts_id, ts_val in time_slots:
+            value = "" if ts_val is None else f' TIME_VALUE="{ts_val}"'
+            write(f'{i2}<TIME_SLOT TIME_SLOT_ID={_attr(ts_id)}{value}/>{nl}')
+        write(f'{i1}</TIME_ORDER>{nl}')
+
+        for tier in tiers:
+            if isinstance(tier, str):
+                write(tier)
             else:
-                ref_el = ET.SubElement(ann_el, 'REF_ANNOTATION', attrib={
-                    'ANNOTATION_ID': ann_id,
-                    'ANNOTATION_REF': annot.ref_id,
-                })
-                if annot.prev_annot:
-                    ref_el.set('PREVIOUS_ANNOTATION', annot.prev_annot)
-                ET.SubElement(ref_el, 'ANNOTATION_VALUE').text = annot.value
-    return root
+                fh.writelines(_tier_xml(*tier, pretty))
 
+        write(f'{i1}<LINGUISTIC_TYPE LINGUISTIC_TYPE_ID="default-lt" TIME_ALIGNABLE="true"/>{nl}')
+        write('</ANNOTATION_DOCUMENT>\n')
 
-def write_eaf(path: str | Path, eaf: EAF) -> None:
+
+def write_eaf(path: Dest, eaf: EAF) -> None:
     """
     Записывает объект EAF в EAF/XML файл с выравниванием и ссылками.
 
@@ -105,212 +157,761 @@ def write_eaf(path: str | Path, eaf: EAF) -> None:
         path: Путь до выходного .eaf файла.
         eaf: Экземпляр EAF для записи.
     """
-    tree = ET.ElementTree(_eaf_to_etree_root(eaf))
-    try:
-        ET.indent(tree, space="    ", level=0)
-    except AttributeError:
-        pass
-    tree.write(path, encoding="utf-8", xml_declaration=True)
+    time_slots = sorted(eaf.time_slots.items(),
+                        key=lambda kv: (kv[1] is None, int(kv[1] or 0)))
+    tiers = ((tier_id, tier.annotations.items()) for tier_id, tier in eaf.tiers.items())
+    write_eaf_stream(path, time_slots, tiers)
 
 
-@dataclass
-class TextGrid:
+def dump_textgrid(dest: Dest, tg: TextGrid, mode: str = "short") -> None:
     """
-    Представляет TextGrid-файл (формат Praat) с несколькими уровнями (tiers),
-    содержащими интервалы или метки во времени.
+    Записывает объект TextGrid в short/long (текст Praat) или binary.
+    Границы уровней и времена точек пишутся так, как были прочитаны.
     """
+    if mode == "binary":
+        with binary_writer(dest) as file:
+            file.write(binary_header(float(tg.xmin), float(tg.xmax), len(tg.tiers)))
+            for tier in tg.tiers:
+                start, end = float(tier.start), float(tier.end)
+                if isinstance(tier, TextGrid.IntervalTier):
+                    file.write(binary_tier_header("IntervalTier", tier.name, start, end,
+                                                  len(tier.labels)))
+                    file.write(binary_intervals(zip(tier.starts, tier.ends, tier.labels)))
+                else:
+                    file.write(binary_tier_header("TextTier", tier.name, start, end,
+                                                  len(tier.items)))
+                    file.write(binary_points((float(point.time), point.label)
+                                             for point in tier.items))
+        return
+    if mode not in TEXTGRID_MODES:
+        raise ValueError(f"Unknown TextGrid mode: {mode}")
+
+    with text_writer(dest) as file:
+        file.write(text_header(mode, tg.xmin, tg.xmax, len(tg.tiers), exists=bool(tg.tiers)))
+        for tier_num, tier in enumerate(tg.tiers, start=1):
+            if isinstance(tier, TextGrid.IntervalTier):
+                file.writelines(interval_tier_text(
+                    mode, tier_num, tier.name, tier.start, tier.end, len(tier.labels),
+                    zip(tier.starts, tier.ends, tier.labels)))
+            else:
+                file.writelines(point_tier_text(
+                    mode, tier_num, tier.name, tier.start, tier.end, len(tier.items),
+                    ((point.time, point.label) for point in tier.items)))
+
+
+# Бинарный TextGrid (ooBinaryFile): числа — big-endian double, счётчики — int32,
+# строки — длина + символы. Короткая строка (w8: имя класса) — u8-длина,
+# строка w16 (имена, метки) — u16-длина и ASCII-байты либо маркер 0xFFFF,
+# u16-длина и UTF-16BE, если есть не-ASCII символы.
+BINARY_MAGIC = b"ooBinaryFile"
+_W16_WIDE = 0xFFFF
+_U8 = struct.Struct(">B")
+_U16 = struct.Struct(">H")
+_I32 = struct.Struct(">i")
+_R64 = struct.Struct(">d")
+_RANGE = struct.Struct(">dd")
+_TIER = struct.Struct(">ddi")         # xmin, xmax, число элементов
+_INTERVAL = struct.Struct(">ddH")     # xmin, xmax, длина метки
+_POINT = struct.Struct(">dH")         # время, длина метки
+
+
+def _w8(text: str) -> bytes:
+    data = text.encode("ascii")
+    return _U8.pack(len(data)) + data
+
+
+def _w16(text: str) -> bytes:
+    if text.isascii():
+        if len(text) >= _W16_WIDE:
+            raise ValueError(f"строка длиннее {_W16_WIDE - 1} символов")
+        return _U16.pack(len(text)) + text.encode("ascii")
+    data = text.encode("utf-16-be")
+    if len(data) // 2 > _W16_WIDE:
+        raise ValueError(f"строка длиннее {_W16_WIDE} символов UTF-16")
+    return _U16.pack(_W16_WIDE) + _U16.pack(len(data) // 2) + data
+
+
+def binary_header(xmin: float, xmax: float, size: int) -> bytes:
+    """Заголовок бинарного TextGrid: класс, диапазон, число уровней."""
+    head = BINARY_MAGIC + _w8("TextGrid") + _RANGE.pack(xmin, xmax)
+    return head + (b"\x01" + _I32.pack(size) if size else b"\x00")
+
+
+def binary_tier_header(tier_class: str, name: str, xmin: float, xmax: float,
+                       size: int) -> bytes:
+    return _w8(tier_class) + _w16(name) + _TIER.pack(xmin, xmax, size)
+
+
+def binary_intervals(entries: tp.Iterable[tuple[float, float, str]]) -> bytes:
+    """Интервалы уровня одним блоком байт."""
+    pack, parts = _INTERVAL.pack, []
+    append = parts.append
+    for start, end, label in entries:
+        if not label:
+            append(pack(start, end, 0))
+        elif label.isascii() and len(label) < _W16_WIDE:
+            append(pack(start, end, len(label)))
+            append(label.encode("ascii"))
+        else:
+            append(_RANGE.pack(start, end))
+            append(_w16(label))
+    return b"".join(parts)
 
-    class Tier:
-        """
-        Базовый класс для уровня в TextGrid, хранит имя, диапазон и элементы.
-        """
 
-        def __init__(self, name: str, start: str = '1e9', end: str = '0.0', size: int = 0) -> None:
-            self.name = name
-            self.start = start
-            self.end = end
-            self.size = size
-            self.items = []
+def binary_points(points: tp.Iterable[tuple[float, str]]) -> bytes:
+    """Точки TextTier одним блоком байт."""
+    return b"".join(_R64.pack(time) + _w16(label) for time, label in points)
 
-        def extend(self, item) -> None:
-            """
-            Добавляет элемент (интервал или точку) в уровень.
-            """
-            self.items.append(item)
 
-    class IntervalTier(Tier):
-        @dataclass
-        class Interval:
-            """
-            Представляет помеченный временной интервал.
-            """
-            label: str
-            start: str
-            end: str
+# Строка в кавычках (возможно, не закрытая до конца строки файла), число
+# или флаг; [...] и комментарии «!» пропускаются. Ключи long-формата
+# («xmin =», «intervals: size =») не содержат цифр и просто не совпадают.
+_TOKEN_RE = re.compile(
+    r'"((?:[^"]|"")*)("?)'
+    r'|(<exists>|<absent>|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+    r'|\[[^\]]*\]|!.*'
+)
+_STRING_TAIL_RE = re.compile(r'((?:[^"]|"")*)("?)')
 
-    class TextTier(Tier):
-        @dataclass
-        class Point:
-            """
-            Представляет помеченную временную точку.
-            """
-            time: str
-            label: str
+TEXTGRID_MODES = ("short", "long", "binary")
 
-    def __init__(self, xmin: str = '1e9', xmax: str = '0.0') -> None:
-        self.xmin: str = xmin
-        self.xmax: str = xmax
-        self.tiers: list[TextGrid.Tier] = []
 
-    @staticmethod
-    def write(filepath: str, textgrid: 'TextGrid') -> None:
-        """
-        Записывает объект TextGrid в файл в тексовом формате Praat.
-        """
-        with open(filepath, 'w') as file:
-            preface = 'File type = "ooTextFile"\nObject class = "TextGrid"\n'
-            file.write(preface + '\n')
-
-            file.write(str(textgrid.xmin) + '\n')
-            file.write(str(textgrid.xmax) + '\n')
-
-            if len(textgrid.tiers) > 0:
-                file.writelines(['<exists>\n', str(len(textgrid.tiers)) + '\n'])
-
-                for tier in textgrid.tiers:
-                    file.writelines(['"Interval Tier"\n', f'"{tier.name}"\n', tier.start + '\n', tier.end + '\n',
-                                     str(tier.size) + '\n'])
-                    for item in tier.items:
-                        file.writelines([item.start + '\n', item.end + '\n', f'"{item.label}"\n'])
-
-
-def _parse_textgrid_short(lines: list[str]) -> TextGrid:
-    """короткий формат Praat"""
-    short_mode = lines[4][0].isdigit()
-    xmin = lines[3].split('= ')[-1]
-    xmax = lines[4].split('= ')[-1]
-    tg = TextGrid(xmin, xmax)
-    idx = 5
-    while idx < len(lines):
-        if lines[idx].endswith('Tier"'):
-            name = lines[idx + 1].split('= ')[-1][1:-1]
-            start = lines[idx + 2].split('= ')[-1]
-            end = lines[idx + 3].split('= ')[-1]
-            size = int(lines[idx + 4].split('= ')[-1])
-            idx += 4
-
-            if lines[idx - 4].split('= ')[-1][1] == 'I':
-                tg.tiers.append(TextGrid.IntervalTier(name, start, end, size))
-                for i in range(size):
-                    if not short_mode:
-                        idx += 1
-                    start = lines[idx + 1].split('= ')[-1]
-                    end = lines[idx + 2].split('= ')[-1]
-                    label = lines[idx + 3].split('= ')[-1][1:-1]
-                    tg.tiers[-1].extend(TextGrid.IntervalTier.Interval(label, start, end))
-                    idx += 3
-
-            elif lines[idx - 4].split('= ')[-1][1] == 'T':
-                tg.tiers.append(TextGrid.TextTier(name, start, end, size))
-                for i in range(size):
-                    if not short_mode:
-                        idx += 1
-                    time = lines[idx + 1].split('= ')[-1]
-                    label = lines[idx + 2].split('= ')[-1][1:-1]
-                    tg.tiers[-1].extend(TextGrid.TextTier.Point(time, label))
-                    idx += 2
-
-        idx += 1
+_NUMBER_START = frozenset("+-.0123456789")
 
-    return tg
+# Элемент уровня в том виде, как его пишет Praat: по лексеме на строку
+# (short) или заголовок «intervals [i]:» и строки «ключ = значение» (long).
+# Строки в кавычках здесь однострочные — многострочные идут медленным путём.
+_VALUE = r'(?:[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|"(?:[^"\n]|"")*")'
+_SHORT_LINE = rf'[ \t]*{_VALUE}[ \t]*\r?\n'
+_LONG_ITEM = rf'[ \t]*[a-z]+ \[\d+\]:[ \t]*\r?\n(?:[ \t]*[a-z]+ = {_VALUE}[ \t]*\r?\n)'
+_BODY_RE = {
+    ("short", 2): re.compile(f"(?:{_SHORT_LINE})*"),
+    ("short", 3): re.compile(f"(?:{_SHORT_LINE})*"),
+    ("long", 2): re.compile(f"(?:{_LONG_ITEM}{{2}})*"),
+    ("long", 3): re.compile(f"(?:{_LONG_ITEM}{{3}})*"),
+}
+_SKIP_CHUNK = 4096  # элементов за одну проверку регулярным выражением
 
 
-def _parse_textgrid_long(lines: list[str]) -> TextGrid:
-    xmin = lines[3].split('=')[-1].strip()
-    xmax = lines[4].split('=')[-1].strip()
-    tg = TextGrid(xmin, xmax)
+class _Tokens:
+    """
+    Лексемы текстового TextGrid по одной, строка за строкой.
 
-    idx = 7
-    while idx < len(lines):
-        line = lines[idx].lstrip()
+    Short и long форматы дают одинаковую последовательность лексем,
+    поэтому разбор дальше не зависит от формата. skip(n) перематывает
+    n лексем, skip_items() — целое тело уровня, сверяя строки блоками.
+    """
 
-        if line.startswith("item []"):
-            idx += 1
+    __slots__ = ("_lines", "_buf", "_pos", "_format")
+
+    def __init__(self, lines: tp.Iterable[str], fmt: str = "short") -> None:
+        self._lines: tp.Iterator[str] = iter(lines)
+        self._buf: list[str] = []
+        self._pos = 0
+        self._format = fmt
+
+    def __iter__(self) -> '_Tokens':
+        return self
+
+    def __next__(self) -> str:
+        pos, buf = self._pos, self._buf
+        if pos < len(buf):
+            self._pos = pos + 1
+            return buf[pos]
+
+        buf = self._buf = []
+        for line in self._lines:
+            self._read(line, 0, buf)
+            if buf:
+                self._pos = 1
+                return buf[0]
+        raise StopIteration
+
+    def _read(self, line: str, pos: int, buf: list[str]) -> None:
+        """Разобрать строку файла с позиции pos, дописывая лексемы в buf."""
+        for text, closed, atom in _TOKEN_RE.findall(line, pos):
+            if atom:
+                buf.append(atom)
+            elif closed:
+                buf.append(text.replace('""', '"'))
+            elif text:
+                # строка в кавычках продолжается на следующих строках файла
+                for line in self._lines:
+                    m = _STRING_TAIL_RE.match(line)
+                    text += m.group(1)
+                    if m.group(2):
+                        buf.append(text.replace('""', '"'))
+                        return self._read(line, m.end(), buf)
+                raise ValueError("TextGrid: незакрытая строка в кавычках")
+
+    def _count_simple(self, line: str) -> int:
+        """
+        Число лексем в строке, как её пишет Praat (числа, «ключ = число»,
+        одна закрытая строка в кавычках), или -1, если строку надо разбирать.
+        """
+        quote = line.find('"')
+        head = line if quote < 0 else line[:quote]
+        if "!" in head:
+            return -1
+        if "[" in head:
+            # «item [2]:», «intervals [5]:» лексем не содержат
+            return 0 if quote < 0 and head.rstrip().endswith("]:") else -1
+
+        count = 0
+        for part in head.split():
+            if part[0] in _NUMBER_START:
+                count += 1
+            elif part != "=" and not part.isalpha():
+                return -1
+        if quote >= 0:
+            if line.count('"') % 2 or line[line.rindex('"') + 1:].strip():
+                return -1
+            count += 1
+        return count
+
+    def skip_items(self, items: int, width: int) -> None:
+        """
+        Пропустить тело уровня: items элементов по width лексем.
+
+        Строки берутся блоками и целиком сверяются с раскладкой Praat
+        одним регулярным выражением; блок, который не совпал (многострочные
+        метки, комментарии, нестандартные переносы), дочитывается skip().
+        """
+        if self._pos < len(self._buf):
+            return self.skip(items * width)
+
+        lines_per_item = width + 1 if self._format == "long" else width
+        body = _BODY_RE[self._format, width]
+        while items > 0:
+            chunk = min(items, _SKIP_CHUNK)
+            block = list(itertools.islice(self._lines, chunk * lines_per_item))
+            if len(block) == chunk * lines_per_item and body.fullmatch("".join(block)):
+                items -= chunk
+                continue
+            self._lines = itertools.chain(block, self._lines)
+            return self.skip(items * width)
+
+    def skip(self, n: int) -> None:
+        """Пропустить n лексем, разбирая строки по одной."""
+        take = min(n, len(self._buf) - self._pos)
+        self._pos += take
+        n -= take
+
+        while n > 0:
+            line = next(self._lines, None)
+            if line is None:
+                raise ValueError("TextGrid: файл обрывается на середине")
+            count = self._count_simple(line)
+            if 0 <= count <= n:
+                n -= count
+                continue
+            buf = self._buf = []
+            self._read(line, 0, buf)
+            self._pos = take = min(n, len(buf))
+            n -= take
+
+
+def detect_textgrid_format(header: tp.Iterable[str]) -> str:
+    """
+    Определить формат по заголовку: в long после «Object class»
+    идёт «xmin = …», в short — просто число.
+    """
+    seen_class = False
+    for line in header:
+        line = line.strip()
+        if not line:
             continue
+        if seen_class:
+            return "long" if line.startswith("xmin") else "short"
+        seen_class = line.startswith("Object class")
+    raise ValueError("TextGrid: не найден заголовок")
+
 
-        if re.match(r"item \[\d+\]:", line):
-            tier_type = lines[idx + 1].split('=')[-1].strip().strip('"')
-            name = lines[idx + 2].split('=')[-1].strip().strip('"')
-            start = lines[idx + 3].split('=')[-1].strip()
-            end = lines[idx + 4].split('=')[-1].strip()
-            size = int(lines[idx + 5].split('=')[-1].strip())
-            idx += 6
+class TextGridReader:
+    """
+    Потоковый разбор текстового TextGrid (short или long — определяется сам).
 
-            if tier_type.lower().startswith("interval"):
+    Файл читается построчно, уровни отдаются по одному через iter_tiers(),
+    так что в памяти одновременно находится не больше одного уровня.
+    Уровни, не прошедшие фильтр tiers, перематываются (_Tokens.skip)
+    без разбора чисел и меток.
+    """
+
+    def __init__(self, source: Source, tiers: TierFilter | None = None) -> None:
+        self._filter = tiers
+        # если заголовок не разобран, файл закрывается здесь же (with),
+        # иначе владение стеком переходит к читателю (pop_all)
+        with contextlib.ExitStack() as stack:
+            self._fh = stack.enter_context(text_reader(source))
+            header: list[str] = []
+            for line in self._fh:
+                header.append(line)
+                if len(header) >= 3 and line.strip():
+                    break
+            self.format = detect_textgrid_format(header)
+            self._tokens = _Tokens(itertools.chain(header, self._fh), self.format)
+
+            if self._next() != "ooTextFile" or self._next() != "TextGrid":
+                raise ValueError("Это не текстовый TextGrid (ooTextFile)")
+            self.xmin = self._next_number()
+            self.xmax = self._next_number()
+            self.size = int(self._next_number()) if self._next() == "<exists>" else 0
+            self._stack = stack.pop_all()
+
+    def __enter__(self) -> 'TextGridReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stack.close()
+
+    def _next(self) -> str:
+        try:
+            return next(self._tokens)
+        except StopIteration:
+            raise ValueError("TextGrid: файл обрывается на середине") from None
+
+    def _next_number(self) -> str:
+        token = self._next()
+        if not token or token[0] not in "+-.0123456789":
+            raise ValueError(f"TextGrid: ожидалось число, получено {token!r}")
+        return token
+
+    def iter_tiers(self) -> tp.Iterator['TextGrid.Tier']:
+        """Уровни по одному, в порядке файла (только выбранные фильтром)."""
+        for _ in range(self.size):
+            tier_class = self._next()
+            name = self._next()
+            start = self._next_number()
+            end = self._next_number()
+            size = int(self._next_number())
+
+            if self._filter is not None and not self._filter(name):
+                if tier_class.startswith("Interval"):
+                    self._tokens.skip_items(size, 3)
+                elif tier_class.startswith("Text"):
+                    self._tokens.skip_items(size, 2)
+                else:
+                    raise ValueError(f"TextGrid: неизвестный тип уровня {tier_class!r}")
+                continue
+
+            if tier_class.startswith("Interval"):
                 tier = TextGrid.IntervalTier(name, start, end, size)
+                append = tier.append
                 for _ in range(size):
-                    xmin_i = lines[idx + 1].split('=')[-1].strip()
-                    xmax_i = lines[idx + 2].split('=')[-1].strip()
-                    text_i = lines[idx + 3].split('=')[-1].strip().strip('"')
-                    tier.extend(TextGrid.IntervalTier.Interval(text_i, xmin_i, xmax_i))
-                    idx += 4
-            else:  # TextTier
+                    xmin = float(self._next_number())
+                    xmax = float(self._next_number())
+                    append(xmin, xmax, self._next())
+            elif tier_class.startswith("Text"):
                 tier = TextGrid.TextTier(name, start, end, size)
                 for _ in range(size):
-                    time_i = lines[idx + 1].split('=')[-1].strip()
-                    text_i = lines[idx + 2].split('=')[-1].strip().strip('"')
-                    tier.extend(TextGrid.TextTier.Point(time_i, text_i))
-                    idx += 3
-
-            tg.tiers.append(tier)
+                    time = self._next_number()
+                    tier.extend(TextGrid.TextTier.Point(time, self._next()))
+            else:
+                raise ValueError(f"TextGrid: неизвестный тип уровня {tier_class!r}")
+            yield tier
+
+
+def _read_w8(buf: bytes, pos: int) -> tuple[str, int]:
+    size = buf[pos]
+    end = pos + 1 + size
+    if end > len(buf):
+        raise IndexError
+    return buf[pos + 1:end].decode("latin-1"), end
+
+
+def _read_w16(buf: bytes, pos: int) -> tuple[str, int]:
+    (size,) = _U16.unpack_from(buf, pos)
+    pos += 2
+    if size != _W16_WIDE:
+        end = pos + size
+        encoding = "latin-1"
+    else:
+        (size,) = _U16.unpack_from(buf, pos)
+        pos += 2
+        end = pos + 2 * size
+        encoding = "utf-16-be"
+    if end > len(buf):
+        raise IndexError
+    return buf[pos:end].decode(encoding), end
+
+
+def read_binary_header(buf: bytes) -> tuple[float, float, int, int]:
+    """(xmin, xmax, число уровней, смещение первого уровня) бинарного TextGrid."""
+    if buf[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise ValueError("Это не бинарный TextGrid (ooBinaryFile)")
+    try:
+        object_class, pos = _read_w8(buf, len(BINARY_MAGIC))
+        if object_class != "TextGrid":
+            raise ValueError(f"Это не TextGrid, а {object_class!r}")
+        xmin, xmax = _RANGE.unpack_from(buf, pos)
+        pos += _RANGE.size
+        if not buf[pos]:  # <absent>
+            return xmin, xmax, 0, pos + 1
+        return xmin, xmax, _I32.unpack_from(buf, pos + 1)[0], pos + 1 + _I32.size
+    except (IndexError, struct.error):
+        raise ValueError("TextGrid: файл обрывается на середине") from None
+
+
+def read_binary_tier_header(buf: bytes, pos: int) -> tuple[str, str, float, float, int, int]:
+    """(класс, имя, xmin, xmax, число элементов, смещение первого элемента)."""
+    tier_class, pos = _read_w8(buf, pos)
+    name, pos = _read_w16(buf, pos)
+    start, end, size = _TIER.unpack_from(buf, pos)
+    if tier_class not in ("IntervalTier", "TextTier"):
+        raise ValueError(f"TextGrid: неизвестный тип уровня {tier_class!r}")
+    return tier_class, name, start, end, size, pos + _TIER.size
+
+
+def binary_item_width(tier_class: str) -> int:
+    """Байт чисел перед меткой у элемента уровня: xmin+xmax или время точки."""
+    return 16 if tier_class == "IntervalTier" else 8
+
+
+def read_binary_items(buf: bytes, pos: int, size: int, tier: 'TextGrid.Tier') -> int:
+    """Дочитать size элементов из буфера в tier; вернуть смещение за ними."""
+    if isinstance(tier, TextGrid.IntervalTier):
+        unpack, u16, append = _INTERVAL.unpack_from, _U16.unpack_from, tier.append
+        for _ in range(size):
+            xmin, xmax, length = unpack(buf, pos)
+            pos += 18
+            if length == _W16_WIDE:
+                (length,) = u16(buf, pos)
+                pos += 2 + 2 * length
+                append(xmin, xmax, buf[pos - 2 * length:pos].decode("utf-16-be"))
+            else:
+                pos += length
+                append(xmin, xmax, buf[pos - length:pos].decode("latin-1"))
+    else:
+        for _ in range(size):
+            (time,) = _R64.unpack_from(buf, pos)
+            label, pos = _read_w16(buf, pos + 8)
+            tier.extend(TextGrid.TextTier.Point(num_to_str(time), label))
+    if pos > len(buf):
+        raise IndexError
+    return pos
+
+
+def skip_binary_items(buf: bytes, pos: int, size: int, width: int) -> int:
+    """Перемотать size элементов «width байт чисел + строка w16», не декодируя метки."""
+    u16 = _U16.unpack_from
+    for _ in range(size):
+        (length,) = u16(buf, pos + width)
+        pos += width + 2
+        if length == _W16_WIDE:
+            (length,) = u16(buf, pos)
+            pos += 2 + 2 * length
         else:
-            idx += 1
+            pos += length
+    if pos > len(buf):
+        raise IndexError
+    return pos
+
+
+class BinaryTextGridReader:
+    """
+    Разбор бинарного TextGrid (ooBinaryFile) с тем же интерфейсом, что
+    у TextGridReader. Файл целиком лежит в памяти (он в несколько раз
+    компактнее текстового), записи достаются struct.unpack_from прямо
+    из буфера — без форматирования чисел и поиска кавычек.
+    """
+
+    format = "binary"
+
+    def __init__(self, data: bytes, tiers: TierFilter | None = None) -> None:
+        xmin, xmax, self.size, self._pos = read_binary_header(data)
+        self.xmin, self.xmax = num_to_str(xmin), num_to_str(xmax)
+        self._buf = data
+        self._filter = tiers
+
+    def __enter__(self) -> 'BinaryTextGridReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._buf = b""
+
+    def iter_tiers(self) -> tp.Iterator['TextGrid.Tier']:
+        """Уровни по одному, в порядке файла (только выбранные фильтром)."""
+        try:
+            yield from self._iter_tiers()
+        except (IndexError, struct.error):
+            raise ValueError("TextGrid: файл обрывается на середине") from None
+
+    def _iter_tiers(self) -> tp.Iterator['TextGrid.Tier']:
+        buf, pos = self._buf, self._pos
+        for _ in range(self.size):
+            tier_class, name, start, end, size, pos = read_binary_tier_header(buf, pos)
+            if self._filter is not None and not self._filter(name):
+                self._pos = pos = skip_binary_items(buf, pos, size, binary_item_width(tier_class))
+                continue
+
+            tier_type = TextGrid.IntervalTier if tier_class == "IntervalTier" else TextGrid.TextTier
+            tier = tier_type(name, num_to_str(start), num_to_str(end), size)
+            self._pos = pos = read_binary_items(buf, pos, size, tier)
+            yield tier
+
+
+def open_textgrid(raw: tp.BinaryIO,
+                  tiers: TierFilter | None = None) -> TextGridReader | BinaryTextGridReader:
+    """
+    Читатель под формат файла: бинарный узнаётся по сигнатуре ooBinaryFile,
+    текстовый (short/long) — по заголовку. raw — поток с peek()
+    (fileio.binary_reader).
+    """
+    if raw.peek(len(BINARY_MAGIC)).startswith(BINARY_MAGIC):
+        return BinaryTextGridReader(raw.read(), tiers)
+    return TextGridReader(raw, tiers)
+
+
+def parse_textgrid(filepath: Source, *, mode: str | None = None,
+                   tiers: TierFilter | None = None) -> TextGrid:
+    """
+    Прочитать TextGrid целиком. Формат (short/long/binary) определяется
+    автоматически; mode оставлен для совместимости и только проверяется.
+    С tiers читаются только выбранные уровни.
+    """
+    if mode is not None and mode not in TEXTGRID_MODES:
+        raise ValueError(f"Unknown TextGrid mode: {mode}")
+    with binary_reader(filepath) as raw, open_textgrid(raw, tiers) as reader:
+        tg = TextGrid(reader.xmin, reader.xmax)
+        tg.tiers.extend(reader.iter_tiers())
     return tg
 
 
-def parse_textgrid(filepath: str | Path, *, mode: str = "short") -> TextGrid:
-    """универсальный вызов: mode='short' | 'long'"""
-    with open(filepath, encoding='utf-8') as fh:
-        lines = [ln.strip() for ln in fh]
-    if mode == "short":
-        return _parse_textgrid_short(lines)
-    if mode == "long":
-        return _parse_textgrid_long(lines)
-    raise ValueError(f"Unknown TextGrid mode: {mode}")
+class TimeSlotIndex:
+    """
+    Индекс тайм-слотов: границы хранятся целыми миллисекундами.
+
+    Сначала в индекс добавляются все границы (add), затем freeze()
+    один раз сортирует уникальные значения и раздаёт ID ts1, ts2, ...
+    по возрастанию времени — TIME_ORDER получается уже упорядоченным.
+
+    Args:
+        tolerance_ms: Границы, отстоящие от первой границы группы не дальше
+            чем на tolerance_ms, сливаются в один слот (0 — только совпадающие).
+    """
+
+    __slots__ = ("tolerance_ms", "_values", "_ids", "rows")
+
+    def __init__(self, tolerance_ms: int = 0) -> None:
+        if tolerance_ms < 0:
+            raise ValueError(f"Допуск не может быть отрицательным: {tolerance_ms}")
+        self.tolerance_ms = tolerance_ms
+        self._values: set[int] = set()
+        self._ids: dict[int, str] = {}
+        self.rows: list[TimeSlotRow] = []
+
+    @staticmethod
+    def to_ms(seconds: float) -> int:
+        return round(seconds * 1000)
+
+    def add(self, seconds: tp.Iterable[float]) -> None:
+        self._values.update(map(self.to_ms, seconds))
+
+    def add_ms(self, values: tp.Iterable[int]) -> None:
+        """Добавить границы, уже переведённые в мс (см. to_ms)."""
+        self._values.update(values)
+
+    def freeze(self) -> list[TimeSlotRow]:
+        """Раздать ID по возрастанию времени; возвращает TIME_ORDER."""
+        ids = self._ids
+        rows = self.rows
+        anchor = None
+        for ms in sorted(self._values):
+            if anchor is None or ms - anchor > self.tolerance_ms:
+                anchor = ms
+                rows.append((f"ts{len(rows) + 1}", ms))
+            ids[ms] = rows[-1][0]
+        self._values = set()
+        return rows
+
+    def __getitem__(self, seconds: float) -> str:
+        return self._ids[self.to_ms(seconds)]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def iter_annotations(tier: TextGrid.IntervalTier, index: TimeSlotIndex,
+                     a_id: int) -> tp.Iterator[AnnotationRow]:
+    """
+    Аннотации уровня с ID a{a_id}, a{a_id + 1}, ... по готовому индексу.
+    Интервал, оба конца которого попали в один тайм-слот (короче 1 мс
+    или короче допуска слияния), пропускается: аннотация нулевой длины
+    в EAF недопустима. Его ID не переиспользуется — номера остальных
+    аннотаций совпадают с параллельным режимом.
+    """
+    for start_sec, end_sec, label in zip(tier.starts, tier.ends, tier.labels):
+        ts1, ts2 = index[start_sec], index[end_sec]
+        if ts1 != ts2:
+            yield f"a{a_id}", EAF.Tier.AlignedAnnotation(label, ts1, ts2, None)
+        a_id += 1
+
+
+def stream_textgrid_to_eaf(
+        tg: TextGrid, *, tolerance_ms: int = 0
+) -> tuple[list[TimeSlotRow], tp.Iterator[TierRows]]:
+    """
+    Готовит TextGrid к потоковой записи через write_eaf_stream.
+
+    Тайм-слоты собираются в TimeSlotIndex одним проходом по колонкам,
+    а аннотации создаются лениво, прямо во время записи, так что
+    EAF-объект целиком в памяти не появляется.
 
+    Args:
+        tg: Разобранный TextGrid.
+        tolerance_ms: Допуск слияния близких границ, мс (см. TimeSlotIndex).
 
-def textgrid_to_eaf(tg: TextGrid) -> EAF:
+    Returns:
+        (TIME_ORDER в порядке возрастания, итератор уровней).
+    """
+    tiers = [tier for tier in tg.tiers if isinstance(tier, TextGrid.IntervalTier)]
+
+    index = TimeSlotIndex(tolerance_ms)
+    for tier in tiers:
+        index.add(tier.starts)
+        index.add(tier.ends)
+    time_slots = index.freeze()
+
+    def iter_tiers() -> tp.Iterator[TierRows]:
+        a_id = 1
+        for tier in tiers:
+            yield tier.name, iter_annotations(tier, index, a_id)
+            a_id += len(tier.labels)
+
+    return time_slots, iter_tiers()
+
+
+def textgrid_to_eaf(tg: TextGrid, *, tolerance_ms: int = 0) -> EAF:
     """
     Конвертирует TextGrid-структуру в EAF-структуру.
 
     Args:
         textgrid: Объект TextGrid с уровнями и метками.
+        tolerance_ms: Допуск слияния близких границ, мс.
 
     Returns:
         EAF: Эквивалентный EAF объект.
     """
-    eaf = EAF()
-    ts_id = 1
-    a_id = 1
-    time_stamps: dict[str, str] = {}
-
-    for tier in tg.tiers:
-        if not isinstance(tier, TextGrid.IntervalTier):
-            continue
-        annotations: dict[str, EAF.Tier.AlignedAnnotation] = {}
-        for item in tier.items:
-            start = str(int(float(item.start) * 1000))
-            if start not in time_stamps:
-                time_stamps[start] = f"ts{ts_id}";
-                ts_id += 1
-            end = str(int(float(item.end) * 1000))
-            if end not in time_stamps:
-                time_stamps[end] = f"ts{ts_id}";
-                ts_id += 1
-            annotations[f"a{a_id}"] = EAF.Tier.AlignedAnnotation(
-                item.label, time_stamps[start], time_stamps[end], None
-            )
-            a_id += 1
-        eaf.tiers[tier.name] = EAF.Tier(annotations)
-    eaf.time_slots = {v: k for k, v in time_stamps.items()}
+    time_slots, tiers = stream_textgrid_to_eaf(tg, tolerance_ms=tolerance_ms)
+    eaf = EAF(time_slots=dict(time_slots))
+    for tier_name, annotations in tiers:
+        eaf.tiers[tier_name] = EAF.Tier(dict(annotations))
     return eaf
+
+
+# Источник уровня для воркера: уже разобранный уровень или аргументы
+# tgindex.read_tier (путь, формат, размер блока, запись индекса) —
+# тогда уровень читает сам воркер, и в пул уходит только запись индекса.
+TierSource = tp.Union[TextGrid.IntervalTier, tuple]
+
+# Замороженный индекс тайм-слотов в процессе-воркере: передаётся один раз
+# при запуске пула, а не с каждым уровнем.
+_worker_index: TimeSlotIndex | None = None
+
+
+def _init_worker(index: TimeSlotIndex) -> None:
+    global _worker_index
+    _worker_index = index
+
+
+def _load_tier(source: TierSource) -> TextGrid.IntervalTier:
+    if isinstance(source, TextGrid.IntervalTier):
+        return source
+    from .tgindex import read_tier
+    return read_tier(*source)
+
+
+def _tier_ms(source: TierSource) -> tuple[array, int]:
+    """(Воркер) уникальные границы уровня в мс и число интервалов."""
+    tier = _load_tier(source)
+    to_ms = TimeSlotIndex.to_ms
+    values = set(map(to_ms, tier.starts))
+    values.update(map(to_ms, tier.ends))
+    return array('q', values), len(tier.labels)
+
+
+def _render_eaf_tier(source: TierSource, a_id: int, pretty: bool) -> str:
+    """(Воркер) элемент TIER целиком, с ID аннотаций начиная с a{a_id}."""
+    tier = _load_tier(source)
+    return "".join(_tier_xml(tier.name, iter_annotations(tier, _worker_index, a_id), pretty))
+
+
+def _ordered_map(pool, fn: tp.Callable, *iterables: tp.Iterable,
+                 ahead: int) -> tp.Iterator:
+    """Как pool.map, но готовых и ждущих записи результатов не больше ahead."""
+    pending: collections.deque = collections.deque()
+    for args in zip(*iterables):
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, *args))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _tier_sources(src: Source, tiers: TierFilter | None) -> list[TierSource]:
+    """
+    Для файла на диске строится индекс смещений (tgindex) без сохранения
+    рядом с файлом, и уровни читаются воркерами; поток или файл, который
+    индекс не понимает, разбирается здесь целиком.
+    """
+    if is_path(src):
+        from .tgindex import TextGridIndex
+        try:
+            index = TextGridIndex(src, cache=False)
+        except ValueError:
+            pass
+        else:
+            with index:
+                return [(str(src), index.format, index.block, entry)
+                        for entry in index.tiers
+                        if entry.tier_class == "IntervalTier"
+                        and (tiers is None or tiers(entry.name))]
+    tg = parse_textgrid(src, tiers=tiers)
+    return [tier for tier in tg.tiers if isinstance(tier, TextGrid.IntervalTier)]
+
+
+def textgrid_to_eaf_parallel(src: Source, dst: Dest, *, workers: int,
+                             tolerance_ms: int = 0, tiers: TierFilter | None = None,
+                             metrics: Metrics | None = None, pretty: bool = True) -> None:
+    """
+    TextGrid → EAF с разбором и сериализацией уровней в пуле процессов.
+
+    Два прохода по уровням: сначала воркеры возвращают границы каждого
+    уровня в мс, здесь они сливаются в один TimeSlotIndex и замораживаются;
+    затем воркеры с готовым индексом отрисовывают элементы TIER, а ID
+    аннотаций им заранее раздаются префиксными суммами размеров уровней.
+    Тайм-слоты, ID и порядок уровней те же, что в последовательном
+    режиме, — файл отличается только атрибутом DATE.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    with stage(metrics, "parse"):
+        sources = _tier_sources(src, tiers)
+
+    index = TimeSlotIndex(tolerance_ms)
+    with stage(metrics, "time_slots"):
+        with ProcessPoolExecutor(workers) as pool:
+            counts = []
+            for values, count in pool.map(_tier_ms, sources):
+                index.add_ms(values)
+                counts.append(count)
+        time_slots = index.freeze()
+
+    a_ids = list(itertools.accumulate(counts, initial=1))[:-1]
+    with stage(metrics, "serialize"):
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(index,)) as pool:
+            # отрисованный уровень — это весь его XML: в памяти держим
+            # лишь столько уровней, сколько воркеров
+            rendered = _ordered_map(pool, _render_eaf_tier, sources, a_ids,
+                                    itertools.repeat(pretty), ahead=workers)
+            write_eaf_stream(dst, time_slots, rendered, pretty=pretty)
+
+    if metrics is not None:
+        metrics.add(tiers=len(sources), annotations=sum(counts))
@@ -1,36 +1,98 @@
+import io
 from pathlib import Path
-from typing import Literal
-from xml.etree import ElementTree as ET
+from typing import BinaryIO, Literal, Optional
 
 from . import textgrid_to_eaf_core as core
 from . import ConversionError
+from .fileio import base_suffix
+from .metrics import Metrics, stage, track
+from .tierfilter import TierFilter
 
-Mode = Literal["short", "long"]
+Mode = Literal["short", "long", "binary"]
 
 
 def convert(input_tg: str | Path,
             output_eaf: str | Path,
             *,
-            mode: Mode = "short") -> None:
+            mode: Mode | None = None,
+            tolerance_ms: int = 0,
+            tiers: Optional[TierFilter] = None,
+            metrics: Optional[Metrics] = None,
+            workers: Optional[int] = None) -> None:
     """
     Конвертация *.TextGrid* → *.eaf* с нормализованным отловом ошибок.
+    Формат TextGrid (short/long/binary) определяется автоматически.
+    Границы ближе tolerance_ms мс сливаются в один тайм-слот.
+    tiers (converters.tierfilter.TierFilter) оставляет только выбранные уровни.
+    metrics (converters.metrics.Metrics) получает время по стадиям,
+    объём входа/выхода и число уровней/аннотаций.
+    С workers > 1 уровни одного файла читаются и сериализуются в пуле
+    процессов; результат тот же, что и без него.
     """
     try:
         path_in = Path(input_tg)
         path_out = Path(output_eaf)
 
-        if mode not in ("short", "long"):
-            raise ValueError(f"Неизвестный режим: {mode}")
         if not path_in.is_file():
             raise FileNotFoundError(path_in)
-        if path_in.suffix.lower() not in {".textgrid", ".tg"}:
-            raise ValueError("Файл должен иметь расширение .TextGrid / .tg")
-        tg = core.parse_textgrid(path_in, mode=mode)
-        core.write_eaf(path_out, core.textgrid_to_eaf(tg))
+        if base_suffix(path_in) not in {".textgrid", ".tg"}:
+            raise ValueError("Файл должен иметь расширение .TextGrid / .tg (можно со сжатием .gz/.bz2/.xz)")
+    except (FileNotFoundError, ValueError) as exc:
+        raise ConversionError(f"TextGrid → EAF: {exc}") from exc
+
+    convert_stream(path_in, path_out, mode=mode, tolerance_ms=tolerance_ms,
+                   tiers=tiers, metrics=metrics, workers=workers)
+
+    if not path_out.exists():
+        raise ConversionError("TextGrid → EAF: Ядро не создало выходной .eaf")
+
+
+def convert_stream(src: BinaryIO | Path,
+                   dst: BinaryIO | Path,
+                   *,
+                   mode: Mode | None = None,
+                   tolerance_ms: int = 0,
+                   tiers: Optional[TierFilter] = None,
+                   metrics: Optional[Metrics] = None,
+                   workers: Optional[int] = None) -> None:
+    """
+    Конвертация *.TextGrid* → *.eaf* между бинарными потоками (или путями),
+    без временных файлов.
+    """
+    try:
+        if mode is not None and mode not in core.TEXTGRID_MODES:
+            raise ValueError(f"Неизвестный режим: {mode}")
+        with track(metrics, "tg2eaf", src, dst, mode=mode):
+            if workers is not None and workers > 1:
+                core.textgrid_to_eaf_parallel(src, dst, workers=workers,
+                                              tolerance_ms=tolerance_ms,
+                                              tiers=tiers, metrics=metrics)
+                return
+            with stage(metrics, "parse"):
+                tg = core.parse_textgrid(src, mode=mode, tiers=tiers)
+            with stage(metrics, "time_slots"):
+                time_slots, converted = core.stream_textgrid_to_eaf(tg, tolerance_ms=tolerance_ms)
+            with stage(metrics, "serialize"):
+                core.write_eaf_stream(dst, time_slots, converted)
+            if metrics is not None:
+                # в EAF попадают только интервальные уровни
+                interval_tiers = [t for t in tg.tiers
+                                  if isinstance(t, core.TextGrid.IntervalTier)]
+                metrics.add(tiers=len(interval_tiers),
+                            annotations=sum(len(t.labels) for t in interval_tiers))
 
-        if not path_out.exists():
-            raise RuntimeError("Ядро не создало выходной .eaf")
+    except Exception as exc:  # в т.ч. битый gzip/bz2/xz: OSError, EOFError, LZMAError
+        raise ConversionError(f"TextGrid → EAF: {exc}") from exc
 
-    except (FileNotFoundError, UnicodeDecodeError, ET.ParseError,
-            ValueError, RuntimeError) as exc:
-        raise ConversionError(f"TextGrid → EAF: {exc}") from exc
\ No newline at end of file
+
+def convert_bytes(data: bytes, *, mode: Mode | None = None, tolerance_ms: int = 0,
+                  tiers: Optional[TierFilter] = None,
+                  metrics: Optional[Metrics] = None,
+                  workers: Optional[int] = None) -> bytes:
+    """
+    Конвертирует содержимое .TextGrid в содержимое .eaf целиком в памяти.
+    """
+    out = io.BytesIO()
+    convert_stream(io.BytesIO(data), out, mode=mode, tolerance_ms=tolerance_ms,
+                   tiers=tiers, metrics=metrics, workers=workers)
+    return out.getvalue()
@@ -0,0 +1,356 @@
+"""
+Произвольный доступ к большим TextGrid через mmap и индекс смещений.
+
+Индекс хранит для каждого уровня его заголовок и смещение каждого
+BLOCK_ITEMS-го элемента вместе с его временем начала. Уровень или окно
+по времени читается с диска блоками, которые его покрывают, — остальные
+страницы файла не трогаются. Индекс сохраняется рядом с файлом
+(«file.TextGrid.tgidx») и пересобирается, если файл изменился.
+
+    with TextGridIndex("huge.TextGrid") as index:
+        index.names                        # ['words', 'phones', ...]
+        words = index.tier("words")        # TextGrid.IntervalTier
+        part = index.query("phones", 120.0, 125.5)
+        tg = index.window(120.0, 125.5)    # все уровни, обрезанные по окну
+
+Поддерживаются short, long (UTF-8) и бинарный TextGrid. Для UTF-16
+(так Praat сохраняет текст с не-ASCII символами) индекс не строится:
+такой файл читается parse_textgrid или один раз пересохраняется в binary.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Pattern, Union
+
+from .fileio import compression_of
+from .model import TextGrid, num_to_str
+from .textgrid_to_eaf_core import (
+    BINARY_MAGIC, binary_item_width, read_binary_header, read_binary_items,
+    read_binary_tier_header, skip_binary_items,
+)
+from .tierfilter import TierFilter
+
+BLOCK_ITEMS = 1024
+INDEX_SUFFIX = ".tgidx"
+INDEX_VERSION = 1
+
+_NUM = rb'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+_STR = rb'"([^"]*(?:""[^"]*)*)"'
+# пробелы между лексемами могут содержать комментарии «! …» до конца строки
+_WS = rb'(?:\s|![^\n!]*)*'
+_SEP = rb'\s(?:\s|![^\n!]*)*'
+
+
+def _compile(pattern: bytes) -> Pattern[bytes]:
+    return re.compile(pattern.replace(rb'\s+', _SEP).replace(rb'\s*', _WS))
+
+
+_HEADER_RE = {
+    "short": _compile(
+        rb'\s*File type = "ooTextFile"\s*Object class = "TextGrid"\s*'
+        rb'(' + _NUM + rb')\s+(' + _NUM + rb')\s+(<exists>|<absent>)(?:\s+(\d+))?'),
+    "long": _compile(
+        rb'\s*File type = "ooTextFile"\s*Object class = "TextGrid"\s*'
+        rb'xmin = (' + _NUM + rb')\s*xmax = (' + _NUM + rb')\s*tiers\? (<exists>|<absent>)'
+        rb'(?:\s*size = (\d+)\s*item \[\]:)?'),
+}
+_TIER_RE = {
+    "short": _compile(
+        rb'\s*"(IntervalTier|TextTier)"\s+' + _STR
+        + rb'\s+(' + _NUM + rb')\s+(' + _NUM + rb')\s+(\d+)'),
+    "long": _compile(
+        rb'\s*item \[\d+\]:\s*class = "(IntervalTier|TextTier)"\s*name = ' + _STR
+        + rb'\s*xmin = (' + _NUM + rb')\s*xmax = (' + _NUM + rb')'
+        rb'\s*(?:intervals|points): size = (\d+)'),
+}
+# Элемент уровня с группами: (xmin, xmax, текст) или (время, метка).
+_ITEM = {
+    ("short", "IntervalTier"): rb'\s*(' + _NUM + rb')\s+(' + _NUM + rb')\s+' + _STR,
+    ("short", "TextTier"): rb'\s*(' + _NUM + rb')\s+' + _STR,
+    ("long", "IntervalTier"): rb'\s*intervals \[\d+\]:\s*xmin = (' + _NUM
+                              + rb')\s*xmax = (' + _NUM + rb')\s*text = ' + _STR,
+    ("long", "TextTier"): rb'\s*points \[\d+\]:\s*number = (' + _NUM + rb')\s*mark = ' + _STR,
+}
+_ITEM_RE = {key: _compile(pattern) for key, pattern in _ITEM.items()}
+
+
+@lru_cache(maxsize=None)
+def _block_re(fmt: str, tier_class: str, count: int) -> Pattern[bytes]:
+    """Ровно count элементов подряд — один вызов регулярного выражения на блок."""
+    item = re.sub(rb'\((?!\?)', b'(?:', _ITEM[fmt, tier_class])
+    return _compile(b'(?:' + item + b'){%d}' % count)
+
+
+@dataclass
+class TierEntry:
+    """
+    Запись индекса об одном уровне. offsets[i] — смещение элемента
+    i * block в файле, offsets[-1] — конец уровня; times[i] — время
+    начала элемента i * block.
+    """
+    tier_class: str
+    name: str
+    xmin: str
+    xmax: str
+    size: int
+    offsets: array
+    times: array
+
+    def to_json(self) -> Dict[str, object]:
+        return {"class": self.tier_class, "name": self.name, "xmin": self.xmin,
+                "xmax": self.xmax, "size": self.size,
+                "offsets": self.offsets.tolist(), "times": self.times.tolist()}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, object]) -> TierEntry:
+        return cls(data["class"], data["name"], data["xmin"], data["xmax"], data["size"],
+                   array("q", data["offsets"]), array("d", data["times"]))
+
+
+def _text(raw: bytes) -> str:
+    text = raw.decode("utf-8")
+    return text.replace('""', '"') if '""' in text else text
+
+
+def _read_blocks(buf: mmap.mmap, fmt: str, block: int, entry: TierEntry,
+                 first: int, last: int) -> TextGrid.Tier:
+    """Уровень с элементами блоков [first, last)."""
+    tier_type = TextGrid.IntervalTier if entry.tier_class == "IntervalTier" else TextGrid.TextTier
+    count = min(entry.size, last * block) - first * block
+    tier = tier_type(entry.name, entry.xmin, entry.xmax, max(count, 0))
+    if count <= 0:
+        return tier
+    start, end = entry.offsets[first], entry.offsets[last]
+
+    if fmt == "binary":
+        read_binary_items(buf, start, count, tier)
+        return tier
+    matches = _ITEM_RE[fmt, entry.tier_class].finditer(buf, start, end)
+    if isinstance(tier, TextGrid.IntervalTier):
+        append = tier.append
+        for m in matches:
+            append(float(m.group(1)), float(m.group(2)), _text(m.group(3)))
+    else:
+        point = TextGrid.TextTier.Point
+        tier.items.extend(point(m.group(1).decode(), _text(m.group(2))) for m in matches)
+    return tier
+
+
+def read_tier(path: Union[str, Path], fmt: str, block: int, entry: TierEntry) -> TextGrid.Tier:
+    """
+    Прочитать уровень по записи индекса без самого TextGridIndex — так
+    уровни одного файла читаются параллельно в разных процессах.
+    """
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _read_blocks(mm, fmt, block, entry, 0, len(entry.times))
+
+
+class TextGridIndex:
+    """
+    TextGrid, отображённый в память, с индексом смещений уровней и блоков.
+
+    Args:
+        path: Путь до .TextGrid (short, long или binary).
+        cache: Читать и сохранять индекс рядом с файлом.
+        index_path: Другой путь для индекса (по умолчанию «path + .tgidx»).
+        block: Элементов в блоке индекса: меньше — точнее окна, больше — компактнее индекс.
+    """
+
+    def __init__(self, path: Union[str, Path], *, cache: bool = True,
+                 index_path: Union[str, Path, None] = None, block: int = BLOCK_ITEMS) -> None:
+        self.path = Path(path)
+        self.block = block
+        self._index_path = (Path(index_path) if index_path is not None
+                            else self.path.with_name(self.path.name + INDEX_SUFFIX))
+        with open(self.path, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            if not st.st_size:
+                raise ValueError("TextGrid: пустой файл")
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._stamp = {"version": INDEX_VERSION, "size": st.st_size,
+                       "mtime_ns": st.st_mtime_ns, "block": block}
+        try:
+            if not (cache and self._load()):
+                self._build()
+                if cache:
+                    self._save()
+        except BaseException:
+            self.close()
+            raise
+        self._by_name = {entry.name: entry for entry in reversed(self.tiers)}
+
+    def __enter__(self) -> TextGridIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mm.close()
+
+    @property
+    def names(self) -> List[str]:
+        return [entry.name for entry in self.tiers]
+
+    # --- построение и кэш индекса ---
+
+    def _detect(self) -> int:
+        """Определить формат; вернуть смещение начала данных."""
+        head = self._mm[:64]
+        if head.startswith(BINARY_MAGIC):
+            self.format = "binary"
+            return 0
+        if compression_of(head):
+            raise ValueError("Сжатый TextGrid не индексируется: распакуйте его "
+                             "или прочитайте parse_textgrid")
+        if head[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+            raise ValueError("TextGrid в UTF-16 не индексируется: "
+                             "прочитайте его parse_textgrid или пересохраните в binary")
+        start = len(codecs.BOM_UTF8) if head.startswith(codecs.BOM_UTF8) else 0
+        self.format = "long" if re.search(rb'TextGrid"\s*xmin', head) else "short"
+        return start
+
+    def _build(self) -> None:
+        start = self._detect()
+        if self.format == "binary":
+            self._build_binary()
+            return
+
+        mm, fmt = self._mm, self.format
+        m = _HEADER_RE[fmt].match(mm, start)
+        if m is None:
+            raise ValueError("TextGrid: не найден заголовок")
+        self.xmin, self.xmax = m.group(1).decode(), m.group(2).decode()
+        count = int(m.group(4) or 0) if m.group(3) == b"<exists>" else 0
+        pos = m.end()
+
+        self.tiers: List[TierEntry] = []
+        for _ in range(count):
+            m = _TIER_RE[fmt].match(mm, pos)
+            if m is None:
+                raise ValueError(f"TextGrid: не разобран заголовок уровня (байт {pos}); "
+                                 f"используйте parse_textgrid")
+            tier_class, size = m.group(1).decode(), int(m.group(5))
+            entry = TierEntry(tier_class, _text(m.group(2)), m.group(3).decode(),
+                              m.group(4).decode(), size, array("q"), array("d"))
+            pos = m.end()
+            item_re = _ITEM_RE[fmt, tier_class]
+            for first in range(0, size, self.block):
+                item = item_re.match(mm, pos)
+                run = _block_re(fmt, tier_class, min(self.block, size - first)).match(mm, pos)
+                if item is None or run is None:
+                    raise ValueError(f"TextGrid: нестандартная разметка уровня "
+                                     f"{entry.name!r} (байт {pos}); используйте parse_textgrid")
+                entry.offsets.append(pos)
+                entry.times.append(float(item.group(1)))
+                pos = run.end()
+            entry.offsets.append(pos)
+            self.tiers.append(entry)
+
+    def _build_binary(self) -> None:
+        mm = self._mm
+        try:
+            xmin, xmax, count, pos = read_binary_header(mm)
+            self.xmin, self.xmax = num_to_str(xmin), num_to_str(xmax)
+            self.tiers = []
+            for _ in range(count):
+                tier_class, name, start, end, size, pos = read_binary_tier_header(mm, pos)
+                entry = TierEntry(tier_class, name, num_to_str(start), num_to_str(end),
+                                  size, array("q"), array("d"))
+                width = binary_item_width(tier_class)
+                for first in range(0, size, self.block):
+                    entry.offsets.append(pos)
+                    entry.times.append(struct.unpack_from(">d", mm, pos)[0])
+                    pos = skip_binary_items(mm, pos, min(self.block, size - first), width)
+                entry.offsets.append(pos)
+                self.tiers.append(entry)
+        except (IndexError, struct.error):
+            raise ValueError("TextGrid: файл обрывается на середине") from None
+
+    def _load(self) -> bool:
+        try:
+            data = json.loads(self._index_path.read_text(encoding="utf-8"))
+            if any(data.get(key) != value for key, value in self._stamp.items()):
+                return False
+            self.format, self.xmin, self.xmax = data["format"], data["xmin"], data["xmax"]
+            self.tiers = [TierEntry.from_json(tier) for tier in data["tiers"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def _save(self) -> None:
+        data = {**self._stamp, "format": self.format, "xmin": self.xmin, "xmax": self.xmax,
+                "tiers": [entry.to_json() for entry in self.tiers]}
+        tmp = self._index_path.with_name(f"{self._index_path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self._index_path)
+        except OSError:  # каталог только для чтения — работаем без кэша
+            tmp.unlink(missing_ok=True)
+
+    # --- чтение ---
+
+    def entry(self, key: Union[str, int]) -> TierEntry:
+        """Запись индекса по имени или номеру уровня."""
+        if isinstance(key, int):
+            return self.tiers[key]
+        try:
+            return self._by_name[key]
+        except KeyError:
+            raise KeyError(f"нет уровня {key!r}") from None
+
+    def _read_blocks(self, entry: TierEntry, first: int, last: int) -> TextGrid.Tier:
+        return _read_blocks(self._mm, self.format, self.block, entry, first, last)
+
+    def tier(self, key: Union[str, int]) -> TextGrid.Tier:
+        """Уровень целиком (читаются только его страницы)."""
+        entry = self.entry(key)
+        return self._read_blocks(entry, 0, len(entry.times))
+
+    def iter_tiers(self, tiers: Optional[TierFilter] = None) -> Iterator[TextGrid.Tier]:
+        """Уровни по одному, в порядке файла (только выбранные фильтром)."""
+        for entry in self.tiers:
+            if tiers is None or tiers(entry.name):
+                yield self._read_blocks(entry, 0, len(entry.times))
+
+    def query(self, key: Union[str, int], start: float, end: float) -> TextGrid.Tier:
+        """
+        Элементы уровня, пересекающие окно [start, end): интервалы
+        с xmin < end и xmax > start, точки с start <= time < end.
+        """
+        entry = self.entry(key)
+        # блок, где начинается элемент, накрывающий start, и первый блок правее окна
+        first = max(bisect_right(entry.times, start) - 1, 0)
+        last = bisect_left(entry.times, end)
+        tier = self._read_blocks(entry, first, last)
+
+        if isinstance(tier, TextGrid.IntervalTier):
+            keep = [i for i, (xmin, xmax) in enumerate(zip(tier.starts, tier.ends))
+                    if xmin < end and xmax > start]
+            window = TextGrid.IntervalTier(entry.name, entry.xmin, entry.xmax, len(keep))
+            for i in keep:
+                window.append(tier.starts[i], tier.ends[i], tier.labels[i])
+        else:
+            window = TextGrid.TextTier(entry.name, entry.xmin, entry.xmax)
+            window.items = [p for p in tier.items if start <= float(p.time) < end]
+            window.size = len(window.items)
+        return window
+
+    def window(self, start: float, end: float,
+               tiers: Optional[TierFilter] = None) -> TextGrid:
+        """Все (или выбранные) уровни, обрезанные по окну [start, end)."""
+        tg = TextGrid(self.xmin, self.xmax)
+        tg.tiers.extend(self.query(i, start, end) for i, entry in enumerate(self.tiers)
+                        if tiers is None or tiers(entry.name))
+        return tg
@@ -0,0 +1,66 @@
+"""
+Выбор уровней по имени для обоих направлений.
+
+Каждый шаблон — точное имя уровня или регулярное выражение, которое
+должно совпасть с именем целиком (re.fullmatch). Невалидное регулярное
+выражение считается просто именем.
+
+    TierFilter(include=["words", "words@.*"], exclude=["phones"])
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+def _compile(pattern: str) -> Pattern[str]:
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return re.compile(re.escape(pattern))
+
+
+def split_patterns(text: str) -> List[str]:
+    """Шаблоны из строки «a, b, c» (для полей ввода в UI)."""
+    return [part.strip() for part in text.split(",") if part.strip()]
+
+
+@dataclass(frozen=True)
+class TierFilter:
+    """
+    Уровень выбран, если совпал хотя бы с одним include (или include пуст)
+    и не совпал ни с одним exclude.
+    """
+    include: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+    _include_re: Tuple[Pattern[str], ...] = field(init=False, repr=False, compare=False)
+    _exclude_re: Tuple[Pattern[str], ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "include", tuple(self.include))
+        object.__setattr__(self, "exclude", tuple(self.exclude))
+        object.__setattr__(self, "_include_re", tuple(map(_compile, self.include)))
+        object.__setattr__(self, "_exclude_re", tuple(map(_compile, self.exclude)))
+
+    @classmethod
+    def build(cls, include: Optional[Iterable[str]] = None,
+              exclude: Optional[Iterable[str]] = None) -> Optional[TierFilter]:
+        """Фильтр или None, если шаблонов нет (выбраны все уровни)."""
+        include, exclude = tuple(include or ()), tuple(exclude or ())
+        return cls(include, exclude) if include or exclude else None
+
+    @staticmethod
+    def _matches(name: str, names: Tuple[str, ...], patterns: Tuple[Pattern[str], ...]) -> bool:
+        return any(name == text or pattern.fullmatch(name)
+                   for text, pattern in zip(names, patterns))
+
+    def __call__(self, name: str) -> bool:
+        if self.include and not self._matches(name, self.include, self._include_re):
+            return False
+        return not self._matches(name, self.exclude, self._exclude_re)
+
+    def key(self) -> str:
+        """Стабильное текстовое представление для ключей кэша и манифеста."""
+        return "+" + "\x1f".join(self.include) + "-" + "\x1f".join(self.exclude)
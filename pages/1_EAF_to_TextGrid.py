@@ -1,31 +1,84 @@
 import traceback
-import tempfile
 from pathlib import Path
 
 import streamlit as st
-from converters.eaf_to_textgrid_wrap import convert as eaf2tg
 from converters import ConversionError
 
 st.header("Конвертер EAF → TextGrid")
 
-file = st.file_uploader("Загрузите .eaf", type=["eaf", "xml"])
-mode = st.radio("Формат TextGrid:", ["short", "long"], horizontal=True)
+batch_mode = st.toggle("Пакетный режим (много файлов или ZIP)")
+mode = st.radio("Формат TextGrid:", ["short", "long", "binary"], horizontal=True)
+with st.expander("Выбор уровней"):
+    include = st.text_input("Только уровни (имена или регулярные выражения через запятую)")
+    exclude = st.text_input("Кроме уровней")
+
+if batch_mode:
+    files = st.file_uploader("Загрузите .eaf или .zip", type=["eaf", "xml", "gz", "bz2", "xz", "zip"],
+                             accept_multiple_files=True)
+    if files:
+        from converters import batch
+        from converters.cache import default_cache
+        from converters.tierfilter import TierFilter, split_patterns
+
+        tiers = TierFilter.build(split_patterns(include), split_patterns(exclude))
+
+        members = batch.expand_uploads(((f.name, f) for f in files), "eaf2tg")
+        if not members:
+            st.warning("Не найдено ни одного .eaf")
+            st.stop()
+
+        progress = st.progress(0.0, text="Конвертация…")
+        archive = batch.ZipResultWriter(".TextGrid")
+        for done, (member, result, error) in enumerate(
+                batch.convert_many(members, "eaf2tg", mode=mode, cache=default_cache(),
+                                   tiers=tiers), start=1):
+            if error is None:
+                archive.add(member.name, result)
+            else:
+                archive.add_error(member.name, error)
+            progress.progress(done / len(members), text=f"{done} / {len(members)}: {member.name}")
+
+        zip_file = archive.close()
+        if archive.errors:
+            st.warning(f"Ошибок: {len(archive.errors)} из {len(members)} (см. errors.txt в архиве)")
+            with st.expander("Показать ошибки"):
+                st.code("\n".join(f"{name}: {error}" for name, error in archive.errors))
+        else:
+            st.success(f"✅ Готово: {len(members)} файлов")
+        st.download_button("📥 Скачать ZIP", zip_file.read(), file_name="textgrid.zip",
+                           mime="application/zip")
+    st.stop()
+
+file = st.file_uploader("Загрузите .eaf (можно сжатый .gz/.bz2/.xz)",
+                        type=["eaf", "xml", "gz", "bz2", "xz"])
 
 if file:
-    with tempfile.TemporaryDirectory() as tmp:
-        src = Path(tmp) / file.name
-        src.write_bytes(file.getbuffer())
-        dst = src.with_suffix(".TextGrid")
-
-        with st.spinner("Конвертация…"):
-            try:
-                eaf2tg(src, dst, mode=mode)
-            except ConversionError as err:
-                st.error(f"❌ {err}")
-
-                with st.expander("Показать подробности"):
-                    st.code(traceback.format_exc())
-                st.stop()
-
-        st.success("✅ Готово!")
-        st.download_button("📥 Скачать", dst.read_bytes(), file_name=dst.name)
+    from converters.cache import default_cache
+    from converters.diagnostics import Diagnostics
+    from converters.fileio import split_compression
+    from converters.tierfilter import TierFilter, split_patterns
+
+    tiers = TierFilter.build(split_patterns(include), split_patterns(exclude))
+    dst_name = split_compression(Path(file.name))[0].with_suffix(".TextGrid").name
+    report = Diagnostics()
+
+    with st.spinner("Конвертация…"):
+        try:
+            result = default_cache().convert(file.getvalue(), "eaf2tg", mode, tiers=tiers,
+                                             diagnostics=report)
+        except ConversionError as err:
+            st.error(f"❌ {err}")
+
+            with st.expander("Показать подробности"):
+                st.code(traceback.format_exc())
+            st.stop()
+
+    st.success("✅ Готово!")
+    if report:
+        skipped = sum(report.count(kind) for kind in ("unknown_slot", "unresolved_ref", "empty"))
+        st.warning(f"Пропущено аннотаций без времени или нулевой длины: {skipped}")
+        with st.expander("Показать замечания"):
+            st.code("\n".join(report.lines("warning")))
+    if report.count("gap"):
+        st.caption(f"Паузы дополнены пустыми интервалами: {report.count('gap')}")
+    st.download_button("📥 Скачать", result, file_name=dst_name)
@@ -1,30 +1,74 @@
 import traceback
-import tempfile
 from pathlib import Path
 
 import streamlit as st
-from converters.textgrid_to_eaf_wrap import convert as tg2eaf
 from converters import ConversionError
 
 st.header("Конвертер TextGrid → EAF")
 
-file = st.file_uploader("Загрузите .TextGrid / .tg", type=["TextGrid", "tg"])
-mode = st.radio("Какой у файла формат", ["short", "long"], horizontal=True)
+batch_mode = st.toggle("Пакетный режим (много файлов или ZIP)")
+st.caption("Формат TextGrid (short, long или бинарный binary) определяется автоматически; "
+           "можно загружать и сжатые .gz/.bz2/.xz.")
+with st.expander("Выбор уровней"):
+    include = st.text_input("Только уровни (имена или регулярные выражения через запятую)")
+    exclude = st.text_input("Кроме уровней")
+
+if batch_mode:
+    files = st.file_uploader("Загрузите .TextGrid / .tg или .zip", type=["TextGrid", "tg", "gz", "bz2", "xz", "zip"],
+                             accept_multiple_files=True)
+    if files:
+        from converters import batch
+        from converters.cache import default_cache
+        from converters.tierfilter import TierFilter, split_patterns
+
+        tiers = TierFilter.build(split_patterns(include), split_patterns(exclude))
+
+        members = batch.expand_uploads(((f.name, f) for f in files), "tg2eaf")
+        if not members:
+            st.warning("Не найдено ни одного .TextGrid")
+            st.stop()
+
+        progress = st.progress(0.0, text="Конвертация…")
+        archive = batch.ZipResultWriter(".eaf")
+        for done, (member, result, error) in enumerate(
+                batch.convert_many(members, "tg2eaf", cache=default_cache(),
+                                   tiers=tiers), start=1):
+            if error is None:
+                archive.add(member.name, result)
+            else:
+                archive.add_error(member.name, error)
+            progress.progress(done / len(members), text=f"{done} / {len(members)}: {member.name}")
+
+        zip_file = archive.close()
+        if archive.errors:
+            st.warning(f"Ошибок: {len(archive.errors)} из {len(members)} (см. errors.txt в архиве)")
+            with st.expander("Детали ошибок"):
+                st.code("\n".join(f"{name}: {error}" for name, error in archive.errors))
+        else:
+            st.success(f"✅ Готово: {len(members)} файлов")
+        st.download_button("📥 Скачать ZIP", zip_file.read(), file_name="eaf.zip",
+                           mime="application/zip")
+    st.stop()
+
+file = st.file_uploader("Загрузите .TextGrid / .tg (можно сжатый .gz/.bz2/.xz)",
+                        type=["TextGrid", "tg", "gz", "bz2", "xz"])
 
 if file:
-    with tempfile.TemporaryDirectory() as tmp:
-        src = Path(tmp) / file.name
-        src.write_bytes(file.getbuffer())
-        dst = src.with_suffix(".eaf")
-
-        with st.spinner("Конвертация…"):
-            try:
-                tg2eaf(src, dst, mode=mode)
-            except ConversionError as err:
-                st.error(f"❌ {err}")
-                with st.expander("Детали ошибки"):
-                    st.code(traceback.format_exc())
-                st.stop()
-
-        st.success("✅ Готово!")
-        st.download_button("📥 Скачать EAF", dst.read_bytes(), file_name=dst.name)
+    from converters.cache import default_cache
+    from converters.fileio import split_compression
+    from converters.tierfilter import TierFilter, split_patterns
+
+    tiers = TierFilter.build(split_patterns(include), split_patterns(exclude))
+    dst_name = split_compression(Path(file.name))[0].with_suffix(".eaf").name
+
+    with st.spinner("Конвертация…"):
+        try:
+            result = default_cache().convert(file.getvalue(), "tg2eaf", tiers=tiers)
+        except ConversionError as err:
+            st.error(f"❌ {err}")
+            with st.expander("Детали ошибки"):
+                st.code(traceback.format_exc())
+            st.stop()
+
+    st.success("✅ Готово!")
+    st.download_button("📥 Скачать EAF", result, file_name=dst_name)
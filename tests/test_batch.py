@@ -0,0 +1,21 @@
+import pytest
+
+from converters.batch import Job, run_batch
+
+from .test_diagnostics import EAF
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unreadable_file_does_not_stop_the_batch(tmp_path, workers):
+    good = tmp_path / "good.eaf"
+    good.write_bytes(EAF)
+    jobs = [Job(tmp_path / "missing.eaf", tmp_path / "out" / "missing.TextGrid"),
+            Job(good, tmp_path / "out" / "good.TextGrid")]
+
+    result = run_batch(jobs, "eaf2tg", workers=workers, cache_dir=str(tmp_path / "cache"))
+
+    assert result.done == 1
+    assert (tmp_path / "out" / "good.TextGrid").is_file()
+    [(src, error)] = result.failed
+    assert src == jobs[0].src
+    assert error.startswith("FileNotFoundError: ")
@@ -0,0 +1,32 @@
+from converters.cache import ConversionCache
+from converters.diagnostics import Diagnostics
+
+from .test_diagnostics import EAF
+
+
+def _convert(cache: ConversionCache) -> Diagnostics:
+    report = Diagnostics()
+    cache.convert(EAF, "eaf2tg", "short", diagnostics=report)
+    return report
+
+
+def test_report_survives_memory_hit():
+    cache = ConversionCache()
+    first = _convert(cache)
+    assert first.count("empty") == 1
+    assert _convert(cache).to_json() == first.to_json()
+
+
+def test_report_survives_disk_hit(tmp_path):
+    first = _convert(ConversionCache(max_memory=0, disk_dir=tmp_path))
+    again = _convert(ConversionCache(max_memory=0, disk_dir=tmp_path))
+    assert again.to_json() == first.to_json()
+
+
+def test_result_without_report_is_converted_again():
+    cache = ConversionCache()
+    key = cache.key(EAF, "eaf2tg", "short")
+    cache.put(key, b"stale")
+    report = Diagnostics()
+    assert cache.convert(EAF, "eaf2tg", "short", diagnostics=report) != b"stale"
+    assert report.count("empty") == 1
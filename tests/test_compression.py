@@ -0,0 +1,49 @@
+import asyncio
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from converters import ConversionError
+from converters.eaf_to_textgrid_wrap import convert_bytes as eaf2tg
+from converters.reformat import reformat_textgrid_bytes
+from converters.textgrid_to_eaf_wrap import convert_bytes as tg2eaf
+
+from .test_diagnostics import EAF
+from .test_server import _exchange
+
+TEXTGRID = eaf2tg(EAF)
+TRUNCATED = {name: module.compress(TEXTGRID)[:40]
+             for name, module in (("gzip", gzip), ("bz2", bz2), ("xz", lzma))}
+
+
+@pytest.mark.parametrize("codec", TRUNCATED)
+@pytest.mark.parametrize("convert", [tg2eaf, reformat_textgrid_bytes])
+def test_truncated_textgrid_raises_conversion_error(codec, convert):
+    with pytest.raises(ConversionError):
+        convert(TRUNCATED[codec])
+
+
+@pytest.mark.parametrize("codec", TRUNCATED)
+def test_truncated_eaf_raises_conversion_error(codec):
+    module = {"gzip": gzip, "bz2": bz2, "xz": lzma}[codec]
+    with pytest.raises(ConversionError):
+        eaf2tg(module.compress(EAF)[:40])
+
+
+def test_server_answers_422_to_truncated_gzip():
+    body = TRUNCATED["gzip"]
+    response = asyncio.run(_exchange(
+        f"POST /tg2eaf HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode() + body))
+    assert response.startswith(b"HTTP/1.1 422 ")
+
+
+def test_compressed_round_trip(tmp_path):
+    from converters.textgrid_to_eaf_wrap import convert
+
+    src = tmp_path / "in.TextGrid.xz"
+    src.write_bytes(lzma.compress(TEXTGRID))
+    convert(src, tmp_path / "out.eaf.gz")
+    assert b"<ANNOTATION_DOCUMENT" in gzip.decompress((tmp_path / "out.eaf.gz").read_bytes())
@@ -0,0 +1,66 @@
+import pytest
+
+from converters import ConversionError
+from converters.diagnostics import Diagnostics
+from converters.eaf_to_textgrid_wrap import convert_bytes as eaf2tg
+from converters.textgrid_to_eaf_core import parse_textgrid
+from converters.textgrid_to_eaf_wrap import convert_bytes as tg2eaf
+
+EAF = b"""<?xml version="1.0" encoding="UTF-8"?>
+<ANNOTATION_DOCUMENT>
+    <HEADER TIME_UNITS="milliseconds" />
+    <TIME_ORDER>
+        <TIME_SLOT TIME_SLOT_ID="ts1" TIME_VALUE="0" />
+        <TIME_SLOT TIME_SLOT_ID="ts2" TIME_VALUE="1000" />
+        <TIME_SLOT TIME_SLOT_ID="ts3" TIME_VALUE="1000" />
+        <TIME_SLOT TIME_SLOT_ID="ts4" TIME_VALUE="2000" />
+    </TIME_ORDER>
+    <TIER TIER_ID="words">
+        <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a1" TIME_SLOT_REF1="ts1" TIME_SLOT_REF2="ts2">
+            <ANNOTATION_VALUE>one</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+        <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a2" TIME_SLOT_REF1="ts2" TIME_SLOT_REF2="ts3">
+            <ANNOTATION_VALUE>empty</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+        <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a3" TIME_SLOT_REF1="ts3" TIME_SLOT_REF2="ts4">
+            <ANNOTATION_VALUE>two</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+    </TIER>
+</ANNOTATION_DOCUMENT>
+"""
+
+
+def _intervals(data: bytes):
+    import io
+    tier = parse_textgrid(io.BytesIO(data)).tiers[0]
+    return list(zip(tier.starts, tier.ends, tier.labels))
+
+
+@pytest.mark.parametrize("mode", ["short", "long", "binary"])
+@pytest.mark.parametrize("workers", [None, 2])
+def test_zero_length_annotation_is_dropped_and_reported(mode, workers):
+    report = Diagnostics()
+    data = eaf2tg(EAF, mode, workers=workers, diagnostics=report)
+
+    assert report.count("empty") == 1
+    assert report.issues["empty", "words"].examples == ["1.0–1.0 'empty'"]
+    assert not report.errors
+    intervals = _intervals(data)
+    assert [label for _, _, label in intervals] == ["one", "two"]
+    assert all(float(start) < float(end) for start, end, _ in intervals)
+
+
+def test_overlap_is_still_an_error():
+    overlapping = EAF.replace(b'TIME_SLOT_REF1="ts3"', b'TIME_SLOT_REF1="ts1"')
+    report = Diagnostics()
+    with pytest.raises(ConversionError):
+        eaf2tg(overlapping, diagnostics=report)
+    assert report.count("overlap") == 1
+
+
+def test_tolerance_merge_drops_collapsed_annotations():
+    tg = (b'File type = "ooTextFile"\nObject class = "TextGrid"\n\n0\n1\n<exists>\n1\n'
+          b'"IntervalTier"\n"t"\n0\n1\n3\n'
+          b'0\n0.5\n"a"\n0.5\n0.502\n"short"\n0.502\n1\n"b"\n')
+    eaf = tg2eaf(tg, tolerance_ms=5).decode()
+
+    assert "short" not in eaf
+    assert 'TIME_SLOT_REF1="ts2" TIME_SLOT_REF2="ts2"' not in eaf
+    assert eaf.count("<ALIGNABLE_ANNOTATION") == 2
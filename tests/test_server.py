@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from converters.server import ConversionServer
+
+
+async def _exchange(request: bytes) -> bytes:
+    server = ConversionServer(workers=1)
+    listener = await server.start("127.0.0.1", 0)
+    try:
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        return response
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        server.close()
+
+
+@pytest.mark.parametrize("length", ["-5", "abc"])
+def test_bad_content_length_gets_400(length):
+    response = asyncio.run(_exchange(
+        f"POST /eaf2tg HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()))
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert "некорректный Content-Length".encode() in response
+    assert b"Connection: close" in response
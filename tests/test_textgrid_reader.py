@@ -0,0 +1,42 @@
+import builtins
+import gzip
+import io
+
+import pytest
+
+from converters import fileio
+from converters.textgrid_to_eaf_core import TextGridReader
+
+BAD = b'File type = "ooTextFile"\nObject class = "Collection"\n\n0\n1\n'
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Файлы, открытые fileio по пути."""
+    handles = []
+
+    def recording_open(*args, **kwargs):
+        fh = builtins.open(*args, **kwargs)
+        handles.append(fh)
+        return fh
+
+    monkeypatch.setattr(fileio, "open", recording_open, raising=False)
+    return handles
+
+
+@pytest.mark.parametrize("name, data", [("bad.TextGrid", BAD),
+                                        ("bad.TextGrid.gz", gzip.compress(BAD))])
+def test_bad_header_closes_the_file(tmp_path, opened, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="ooTextFile") as excinfo:
+        TextGridReader(path)
+    # excinfo держит traceback, а с ним и читателя: закрыть файл должен __init__, а не GC
+    assert opened and all(fh.closed for fh in opened)
+
+
+def test_bad_header_leaves_a_foreign_stream_open():
+    stream = io.BytesIO(BAD)
+    with pytest.raises(ValueError):
+        TextGridReader(stream)
+    assert not stream.closed